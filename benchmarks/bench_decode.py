@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Photo sizes (h, w): small upload, HD, 9 MP, 12 MP and 24 MP phone cameras
+RESOLUTIONS = [(480, 640), (1080, 1440), (2268, 4032), (3024, 4032), (4000, 6000)]
+
+
+def write_photo(path, height, width, seed=0):
+    """Synthetic leaf photo as a quality-90 JPEG (drawn at 1/4 size and upscaled, to keep generation cheap)."""
+    from PIL import Image
+    from benchmarks.common import synthetic_leaf_image
+    small = synthetic_leaf_image(np.random.default_rng(seed), max(32, height // 4), max(32, width // 4))
+    Image.fromarray(small).resize((width, height), Image.BICUBIC).save(path, format="JPEG", quality=90)
+
+
+def measure(mode, path, iterations):
+    """Runs in a fresh process: decode + TTA views per request, and the extra peak RSS it needs."""
+    from benchmarks.common import peak_rss_mb, time_calls
+    from src.image_io import load_image, jpeg_scale_ratio
+    from src.model_runtime import make_tta_fn
+    import tensorflow as tf
+
+    tta = make_tta_fn(config.TTA_PRESETS[config.TTA_MODE])
+    target_size = config.IMG_SIZE if mode == "fast" else None
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    def request(payload):
+        return tta(load_image(payload, target_size)).numpy()
+
+    tta(np.zeros((64, 64, 3), np.float32))  # Trace before the memory baseline
+    baseline_mb = peak_rss_mb()
+    views = request(data)
+    lat = time_calls(request, data, iterations)
+    result = {"mode": mode, "p50_ms": float(np.percentile(lat, 50)), "mean_ms": float(lat.mean()),
+              "peak_rss_delta_mb": peak_rss_mb() - baseline_mb}
+
+    if mode == "fast":
+        height, width, _ = tf.io.extract_jpeg_shape(data).numpy()
+        result["ratio"] = jpeg_scale_ratio(height, width, config.IMG_SIZE)
+        # How far the reduced-resolution views are from the full-resolution ones (0-255 scale)
+        full = tta(load_image(data)).numpy()
+        result["mean_abs_diff"] = float(np.abs(views - full).mean())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-resolution vs reduced-resolution (DCT-scaled) JPEG decode per request.")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child[0], args.child[1], args.iterations)))
+        return
+
+    print(f"📊 Decode + {config.TTA_MODE} TTA per upload ({len(config.TTA_PRESETS[config.TTA_MODE])} views, "
+          f"target {config.IMG_SIZE[0]}x{config.IMG_SIZE[1]})")
+    with tempfile.TemporaryDirectory() as tmp:
+        for height, width in RESOLUTIONS:
+            path = os.path.join(tmp, f"{height}x{width}.jpg")
+            write_photo(path, height, width)
+            results = {}
+            for mode in ("full", "fast"):
+                # One process per measurement, so peak RSS belongs to this mode / size only
+                proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path,
+                                       "--iterations", str(args.iterations)], capture_output=True, text=True)
+                if proc.returncode != 0:
+                    print(f"   {height}x{width} {mode} failed:\n{proc.stderr[-2000:]}")
+                    break
+                results[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+            if len(results) < 2:
+                continue
+            full, fast = results["full"], results["fast"]
+            print(f"   {height:>4}x{width:<4} ({height * width / 1e6:4.1f} MP, 1/{fast['ratio']} decode)  "
+                  f"full {full['p50_ms']:7.1f} ms / +{full['peak_rss_delta_mb']:5.0f} MB | "
+                  f"fast {fast['p50_ms']:6.1f} ms / +{fast['peak_rss_delta_mb']:5.0f} MB | "
+                  f"{full['p50_ms'] / fast['p50_ms']:4.1f}x faster | pixel diff {fast['mean_abs_diff']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
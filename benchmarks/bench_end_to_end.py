@@ -0,0 +1,372 @@
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Connect to config
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+import config
+
+# End-to-end benchmark of the serving path, on synthetic leaf photos (no dataset needed):
+#   cold start      import, model load, warm-up and first request, per TTA mode (fresh process each)
+#   latency         single predict_robust() calls on encoded JPEGs (decode + TTA + model + interpret)
+#   throughput      predict_batch() images/s per batch size
+#   load            the Flask app in its own process, driven by concurrent local HTTP clients
+# Everything is written to one JSON file; --baseline prints the change against an earlier run.
+
+# Metrics compared by --baseline (higher is better for the throughput ones)
+HIGHER_IS_BETTER = ("images_per_s", "requests_per_s")
+COMPARED = ("total_s", "p50_ms", "p99_ms", "peak_rss_mb") + HIGHER_IS_BETTER
+
+
+def synthetic_jpegs(count, size, seed=0):
+    """`count` distinct synthetic leaf photos of `size` (h, w), JPEG-encoded like a phone upload."""
+    from PIL import Image
+    from benchmarks.common import LESION_COLORS, synthetic_leaf_image
+    rng = np.random.default_rng(seed)
+    images = []
+    for i in range(count):
+        img = synthetic_leaf_image(rng, *size, lesion_color=LESION_COLORS[i % len(LESION_COLORS)])
+        buf = io.BytesIO()
+        Image.fromarray(img).save(buf, format="JPEG", quality=90)
+        images.append(buf.getvalue())
+    return images
+
+
+def summarize(latencies_ms):
+    lat = np.asarray(latencies_ms, dtype=np.float64)
+    if lat.size == 0:
+        return {"n": 0}
+    return {"n": int(lat.size), "mean_ms": float(lat.mean()), "p50_ms": float(np.percentile(lat, 50)),
+            "p90_ms": float(np.percentile(lat, 90)), "p99_ms": float(np.percentile(lat, 99)),
+            "max_ms": float(lat.max())}
+
+
+def prepare_model():
+    """The trained model when present, otherwise a random-weight model of the same shape (saved once)."""
+    if os.path.exists(config.MODEL_PATH):
+        return config.MODEL_PATH
+    path = os.path.join(tempfile.gettempdir(), "leaf_bench_random_model.h5")
+    if not os.path.exists(path):
+        from src.model_builder import build_model
+        with open(config.CLASS_INDICES_PATH, 'r') as f:
+            num_classes = len(json.load(f))
+        print(f"⚠️ No trained model found. Using random weights ({num_classes} classes).")
+        build_model(num_classes=num_classes, img_size=config.IMG_SIZE, weights=None).save(path)
+    return path
+
+
+def configure(model_path, tta_mode):
+    # Distinct images only: the prediction cache would otherwise answer the repeats
+    config.MODEL_PATH = model_path
+    config.TTA_MODE = tta_mode
+    config.PREDICTION_CACHE = False
+    config.SAVE_UPLOADS = False
+
+
+# ==========================================
+# Child process: one predictor, one TTA mode
+# ==========================================
+def measure_predictor(args):
+    configure(args.model_path, args.child)
+
+    # 1. Cold start, in the order a web worker goes through it
+    start = time.perf_counter()
+    from src.inference_pipeline import DiseasePredictor
+    import_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictor = DiseasePredictor()
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictor.warm_up()
+    warmup_s = time.perf_counter() - start
+
+    images = synthetic_jpegs(max(args.iterations, args.batch_images) + 1, args.image_size, seed=1)
+    start = time.perf_counter()
+    predictor.predict_robust(images[-1])
+    first_request_ms = (time.perf_counter() - start) * 1000
+
+    # 2. Single-request latency distribution
+    latencies = []
+    for i in range(args.iterations):
+        start = time.perf_counter()
+        predictor.predict_robust(images[i])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    # 3. Batch throughput
+    throughput = []
+    for batch_size in args.batch_sizes:
+        list(predictor.predict_batch(images[:batch_size], batch_size=batch_size))  # warm this batch shape
+        sources = images[:args.batch_images]
+        start = time.perf_counter()
+        for _ in predictor.predict_batch(sources, batch_size=batch_size):
+            pass
+        elapsed = time.perf_counter() - start
+        throughput.append({"batch_size": batch_size, "images": len(sources),
+                           "images_per_s": len(sources) / elapsed})
+
+    import tensorflow as tf
+    from benchmarks.common import peak_rss_mb
+    return {
+        "tta_mode": args.child,
+        "views": len(config.TTA_PRESETS[args.child]),
+        "tensorflow": tf.__version__,
+        "cold_start": {"import_s": import_s, "load_s": load_s, "warmup_s": warmup_s,
+                       "first_request_ms": first_request_ms,
+                       "total_s": import_s + load_s + warmup_s + first_request_ms / 1000},
+        "latency": summarize(latencies),
+        "throughput": throughput,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_child(args, tta_mode):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", tta_mode, "--model-path", args.model_path,
+           "--iterations", str(args.iterations), "--batch-images", str(args.batch_images),
+           "--batch-sizes", *map(str, args.batch_sizes), "--image-size", *map(str, args.image_size)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+    if proc.returncode != 0:
+        print(f"   {tta_mode:<5} failed:\n{proc.stderr[-2000:]}")
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# ==========================================
+# Load generator against the Flask app
+# ==========================================
+def serve(args):
+    """Child process: the web app (threaded dev server) on 127.0.0.1:<port>."""
+    configure(args.model_path, args.tta_mode)
+    config.WARMUP_ON_START = True
+    from web.app import app
+    app.run(host="127.0.0.1", port=args.serve, threaded=True, debug=False)
+
+
+def wait_ready(base_url, proc, timeout):
+    import requests
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode}")
+        try:
+            if requests.get(base_url + "/readyz", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Server not ready after {timeout}s")
+
+
+def drive(base_url, endpoint, images, concurrency, duration):
+    """`concurrency` clients posting images back to back for `duration` seconds."""
+    import requests
+    field = 'files' if endpoint.startswith('/api/') else 'file'
+    deadline = time.monotonic() + duration
+    latencies, statuses, lock = [], Counter(), threading.Lock()
+
+    def client(k):
+        session = requests.Session()
+        i = k
+        while time.monotonic() < deadline:
+            data = images[i % len(images)]
+            i += concurrency
+            start = time.perf_counter()
+            try:
+                code = session.post(base_url + endpoint, files={field: ("leaf.jpg", data, "image/jpeg")},
+                                    allow_redirects=False, timeout=120).status_code
+            except requests.RequestException as e:
+                code = type(e).__name__
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                statuses[str(code)] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    wall = time.perf_counter() - start
+    return {"concurrency": concurrency, "requests": len(latencies), "requests_per_s": len(latencies) / wall,
+            "statuses": dict(statuses), "latency": summarize(latencies)}
+
+
+def stage_means(metrics_text):
+    """Mean seconds per pipeline stage from the server's /metrics (user-visible breakdown)."""
+    sums, counts = {}, {}
+    for line in metrics_text.splitlines():
+        for suffix, target in (("_sum", sums), ("_count", counts)):
+            prefix = f"leaf_stage_seconds{suffix}{{stage=\""
+            if line.startswith(prefix):
+                name, value = line[len(prefix):].split("\"} ")
+                target[name] = float(value)
+    return {name: {"mean_ms": sums[name] / counts[name] * 1000, "count": int(counts[name])}
+            for name in sums if counts.get(name)}
+
+
+def peak_rss_of(pid):
+    """Peak RSS of another process (Linux /proc), in MB."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def run_load(args):
+    import requests
+    from src.distributed import free_ports
+    port = free_ports(1)[0]
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port),
+                               "--model-path", args.model_path, "--tta-mode", args.tta_mode],
+                              cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        start = time.perf_counter()
+        wait_ready(base_url, server, timeout=args.server_timeout)
+        ready_s = time.perf_counter() - start
+        print(f"   server ready in {ready_s:.1f}s ({args.endpoint}, TTA {args.tta_mode})")
+
+        images = synthetic_jpegs(64, args.image_size, seed=2)
+        levels = []
+        for concurrency in args.concurrency:
+            level = drive(base_url, args.endpoint, images, concurrency, args.duration)
+            levels.append(level)
+            lat = level["latency"]
+            print(f"   {concurrency:>3} clients  {level['requests_per_s']:7.2f} req/s | "
+                  f"p50 {lat.get('p50_ms', 0):8.1f} ms | p99 {lat.get('p99_ms', 0):8.1f} ms | {level['statuses']}")
+
+        metrics = requests.get(base_url + "/metrics", timeout=5)
+        return {"endpoint": args.endpoint, "tta_mode": args.tta_mode, "ready_s": ready_s, "levels": levels,
+                "stages": stage_means(metrics.text) if metrics.status_code == 200 else None,
+                "server_peak_rss_mb": peak_rss_of(server.pid)}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+# ==========================================
+# Report
+# ==========================================
+def flatten(node, prefix=""):
+    """{"a.b.c": number} for every numeric leaf; list items are keyed by their batch size / concurrency / mode."""
+    flat = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            flat.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(node, list):
+        for item in node:
+            tag = next((f"{k}={item[k]}" for k in ("tta_mode", "batch_size", "concurrency") if isinstance(item, dict) and k in item), None)
+            if tag:
+                flat.update(flatten(item, f"{prefix}{tag}."))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        flat[prefix[:-1]] = node
+    return flat
+
+
+def compare(result, baseline_path):
+    with open(baseline_path, 'r') as f:
+        baseline = flatten(json.load(f)["results"])
+    current = flatten(result["results"])
+    print(f"\n📈 Against {baseline_path}")
+    for key in sorted(current):
+        if key.rsplit(".", 1)[-1] not in COMPARED or not baseline.get(key):
+            continue
+        change = (current[key] - baseline[key]) / baseline[key]
+        better = change > 0 if key.endswith(HIGHER_IS_BETTER) else change < 0
+        flag = "  " if abs(change) <= 0.05 else "✅" if better else "⚠️ "  # Within 5%: noise
+        print(f"   {flag} {key:<60} {baseline[key]:10.2f} -> {current[key]:10.2f} ({change:+.1%})")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end inference benchmark (synthetic images, JSON report).")
+    parser.add_argument("--tta-modes", nargs="+", default=list(config.TTA_PRESETS), choices=list(config.TTA_PRESETS))
+    parser.add_argument("--iterations", type=int, default=50, help="Single requests timed per TTA mode")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--batch-images", type=int, default=64, help="Images per throughput measurement")
+    parser.add_argument("--image-size", type=int, nargs=2, default=[1080, 1440], metavar=("H", "W"),
+                        help="Synthetic photo size (default: a typical phone picture)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Load generator client counts")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per load level")
+    parser.add_argument("--endpoint", default="/api/v1/predict", choices=["/api/v1/predict", "/predict"])
+    parser.add_argument("--tta-mode", default=config.TTA_MODE, help="TTA mode of the server under load")
+    parser.add_argument("--server-timeout", type=float, default=300)
+    parser.add_argument("--skip-load", action="store_true", help="Only benchmark the predictor")
+    parser.add_argument("--output", help="JSON report path (default: benchmarks/results/e2e_<time>.json)")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--model-path", help=argparse.SUPPRESS)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_predictor(args)))
+        return
+    if args.serve:
+        serve(args)
+        return
+
+    args.model_path = prepare_model()
+    report = {
+        "benchmark": "end_to_end",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": git_commit(),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "settings": {"model": os.path.basename(args.model_path), "image_size": args.image_size,
+                     "inference_mode": config.INFERENCE_MODE, "micro_batching": config.MICRO_BATCHING,
+                     "max_batch_size": config.MAX_BATCH_SIZE, "prediction_cache": False,
+                     "iterations": args.iterations, "batch_images": args.batch_images,
+                     "duration_s": args.duration},
+        "results": {"predictor": [], "load": None},
+    }
+
+    # 1. Predictor: cold start, latency, throughput and RSS per TTA mode (fresh process each)
+    print(f"📊 Predictor ({args.image_size[0]}x{args.image_size[1]} JPEGs, {config.INFERENCE_MODE} inference)")
+    for mode in args.tta_modes:
+        r = run_child(args, mode)
+        if r is None:
+            continue
+        report["results"]["predictor"].append(r)
+        cold, lat = r["cold_start"], r["latency"]
+        rates = ", ".join(f"bs{t['batch_size']} {t['images_per_s']:.1f}/s" for t in r["throughput"])
+        print(f"   {mode:<5} ({r['views']} views) cold {cold['total_s']:5.1f}s | p50 {lat['p50_ms']:7.1f} ms | "
+              f"p99 {lat['p99_ms']:7.1f} ms | {rates} | RSS {r['peak_rss_mb']:6.0f} MB")
+
+    # 2. The web app under concurrent load
+    if not args.skip_load:
+        print(f"\n🌐 Load ({', '.join(map(str, args.concurrency))} concurrent clients, {args.duration:g}s each)")
+        report["results"]["load"] = run_load(args)
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"e2e_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report saved to {output}")
+
+    if args.baseline:
+        compare(report, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import os
+import sys
+import argparse
+import numpy as np
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from benchmarks.common import load_benchmark_model, time_calls
+from src.model_runtime import INFERENCE_MODES, make_predict_fn, warm_up
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call latency of each inference mode on a TTA-sized batch.")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    model = load_benchmark_model()
+    rng = np.random.default_rng(0)
+    batch = rng.uniform(0, 255, (args.batch_size, config.IMG_SIZE[0], config.IMG_SIZE[1], 3)).astype(np.float32)
+
+    results = {}
+    for mode in INFERENCE_MODES:
+        predict_fn = make_predict_fn(model, mode)
+        warm_up(predict_fn, batch_sizes=(args.batch_size,))
+        lat = time_calls(predict_fn, batch, args.iterations)
+        results[mode] = {"p50_ms": float(np.percentile(lat, 50)),
+                         "p99_ms": float(np.percentile(lat, 99)),
+                         "mean_ms": float(lat.mean())}
+
+    print(f"\n📊 Batch of {args.batch_size}, {args.iterations} calls each")
+    baseline = results["keras"]["mean_ms"]
+    for mode, r in results.items():
+        saved = baseline - r["mean_ms"]
+        print(f"   {mode:<9} p50 {r['p50_ms']:7.2f} ms | p99 {r['p99_ms']:7.2f} ms | "
+              f"saved vs keras {saved:+7.2f} ms/call")
+
+
+if __name__ == "__main__":
+    main()
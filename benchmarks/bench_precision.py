@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import subprocess
+import tempfile
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+POLICIES = ("float32", "mixed_float16", "mixed_bfloat16")
+
+
+def measure(policy, jit, data_dir, epochs, fine_tune, weights):
+    """Runs inside a fresh process (the precision policy is global, and RSS must be per-run)."""
+    import tensorflow as tf
+    from benchmarks.common import peak_rss_mb
+    from src.data_pipeline import build_dataset
+    from src.model_builder import build_model
+
+    tf.keras.utils.set_random_seed(config.SEED)
+    tf.keras.mixed_precision.set_global_policy(policy)
+    train_ds, folder = build_dataset(os.path.join(data_dir, "train"), training=True)
+    val_ds, _ = build_dataset(os.path.join(data_dir, "val"), training=False)
+
+    model = build_model(num_classes=folder.num_classes, img_size=config.IMG_SIZE, fine_tune=fine_tune, weights=weights)
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=config.LEARNING_RATE),
+                  loss="categorical_crossentropy", metrics=["accuracy"], jit_compile=jit)
+
+    class StepTimer(tf.keras.callbacks.Callback):
+        def __init__(self):
+            super().__init__()
+            self.times = []
+
+        def on_train_batch_begin(self, batch, logs=None):
+            self.start = time.perf_counter()
+
+        def on_train_batch_end(self, batch, logs=None):
+            self.times.append(time.perf_counter() - self.start)
+
+    timer = StepTimer()
+    history = model.fit(train_ds, epochs=epochs, validation_data=val_ds, callbacks=[timer], verbose=0)
+    steady = timer.times[len(timer.times) // max(1, epochs):] or timer.times  # skip the first (tracing) epoch
+
+    return {"policy": policy, "jit_compile": jit,
+            "first_step_s": timer.times[0],
+            "step_ms": 1000 * sorted(steady)[len(steady) // 2],
+            "peak_rss_mb": peak_rss_mb(),
+            "val_accuracy": float(history.history["val_accuracy"][-1])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Step time, peak memory and val accuracy per precision policy / XLA setting.")
+    parser.add_argument("--data-dir", default=None, help="Folder with train/ and val/ class folders (default: synthetic)")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--phase", type=int, choices=(1, 2), default=2, help="1 = frozen base, 2 = top layers unfrozen")
+    parser.add_argument("--weights", default=None, help="Backbone weights, e.g. 'imagenet' (default: random init)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        policy, jit = args.child.split(",")
+        print(json.dumps(measure(policy, jit == "1", args.data_dir, args.epochs, args.phase == 2, args.weights)))
+        return
+
+    tmp = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        from benchmarks.common import make_synthetic_dataset
+        tmp = tempfile.TemporaryDirectory()
+        make_synthetic_dataset(os.path.join(tmp.name, "train"), num_classes=3, per_class=4 * config.BATCH_SIZE // 3)
+        make_synthetic_dataset(os.path.join(tmp.name, "val"), num_classes=3, per_class=config.BATCH_SIZE // 3, seed=1)
+        data_dir = tmp.name
+
+    print(f"📊 Precision / XLA (phase {args.phase}, {args.epochs} epochs, batch {config.BATCH_SIZE}, CPU)")
+    for policy, jit in itertools.product(POLICIES, (False, True)):
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", f"{policy},{int(jit)}", "--data-dir", data_dir,
+               "--epochs", str(args.epochs), "--phase", str(args.phase)]
+        if args.weights:
+            cmd += ["--weights", args.weights]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        label = f"{policy}{' + XLA' if jit else ''}"
+        if proc.returncode != 0:
+            print(f"   {label:<22} failed: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"   {label:<22} step {r['step_ms']:8.1f} ms | first step {r['first_step_s']:6.1f}s | "
+              f"RSS {r['peak_rss_mb']:6.0f} MB | val acc {r['val_accuracy']:.1%}")
+
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import numpy as np
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from src.export_tflite import QUANTIZATION_MODES, tflite_path
+
+
+def measure(backend, model_path, iterations, val_images):
+    """Runs inside a fresh process so RSS reflects only this backend."""
+    from benchmarks.common import load_val_sample, peak_rss_mb, time_calls
+
+    # Measure the raw engine, not the cache or the micro-batcher
+    config.PREDICTION_CACHE = False
+    config.MICRO_BATCHING = False
+
+    start = time.perf_counter()
+    if backend == "keras":
+        from src.inference_pipeline import DiseasePredictor
+        predictor = DiseasePredictor()
+    else:
+        from src.tflite_runtime import TFLiteDiseasePredictor
+        predictor = TFLiteDiseasePredictor(model_path)
+    predictor.warm_up()
+    load_s = time.perf_counter() - start
+
+    image = np.random.default_rng(0).uniform(0, 255, (config.IMG_SIZE[0], config.IMG_SIZE[1], 3)).astype(np.float32)
+    lat = time_calls(predictor.predict_probabilities, image, iterations)
+
+    sample = load_val_sample(val_images)
+    accuracy = None
+    if sample:
+        correct = sum(int(np.argmax(predictor.predict_probabilities(img)) == label) for img, label in sample)
+        accuracy = correct / len(sample)
+
+    return {"backend": backend, "model_mb": os.path.getsize(model_path) / 1e6,
+            "load_s": load_s, "p50_ms": float(np.percentile(lat, 50)), "p99_ms": float(np.percentile(lat, 99)),
+            "accuracy": accuracy, "val_images": len(sample), "peak_rss_mb": peak_rss_mb()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare accuracy, latency and RSS of the Keras model vs exported TFLite engines.")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--val-images", type=int, default=300)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--model-path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.model_path, args.iterations, args.val_images)))
+        return
+
+    candidates = [("keras", config.MODEL_PATH)] + [(f"tflite-{m}", tflite_path(m)) for m in QUANTIZATION_MODES]
+    print(f"📊 Backends ({len(config.TTA_PRESETS[config.TTA_MODE])} TTA views per image)")
+    for name, path in candidates:
+        if not os.path.exists(path):
+            print(f"   {name:<15} skipped ({os.path.basename(path)} not found)")
+            continue
+        backend = "keras" if name == "keras" else "tflite"
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", backend, "--model-path", path,
+                               "--iterations", str(args.iterations), "--val-images", str(args.val_images)],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"   {name:<15} failed:\n{proc.stderr[-2000:]}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        acc = f"{r['accuracy']:.1%} ({r['val_images']} imgs)" if r["accuracy"] is not None else "n/a"
+        print(f"   {name:<15} {r['model_mb']:6.1f} MB | load {r['load_s']:5.1f}s | p50 {r['p50_ms']:7.1f} ms | "
+              f"p99 {r['p99_ms']:7.1f} ms | RSS {r['peak_rss_mb']:6.0f} MB | top-1 {acc}")
+
+
+if __name__ == "__main__":
+    main()
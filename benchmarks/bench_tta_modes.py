@@ -0,0 +1,41 @@
+import os
+import sys
+import argparse
+import numpy as np
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from benchmarks.common import load_benchmark_model, load_val_sample, time_calls
+from src.model_runtime import make_image_predict_fn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency / accuracy tradeoff of each config.TTA_PRESETS mode.")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--val-images", type=int, default=300, help="Images from VAL_DIR used for accuracy")
+    args = parser.parse_args()
+
+    model = load_benchmark_model()
+    sample = load_val_sample(args.val_images) if os.path.exists(config.MODEL_PATH) else []
+    if not sample:
+        print("ℹ️  Accuracy skipped (needs a trained model and config.VAL_DIR).")
+
+    # A typical phone-photo sized input, so the resize cost is realistic
+    image = np.random.default_rng(0).uniform(0, 255, (1080, 1440, 3)).astype(np.float32)
+
+    print(f"\n📊 TTA modes ({config.INFERENCE_MODE} inference)")
+    for mode, augmentations in config.TTA_PRESETS.items():
+        predict_image = make_image_predict_fn(model, config.INFERENCE_MODE, augmentations)
+        predict_image(image)  # trace + warm up
+        lat = time_calls(predict_image, image, args.iterations)
+
+        line = f"   {mode:<5} ({len(augmentations)} views) p50 {np.percentile(lat, 50):7.2f} ms | p99 {np.percentile(lat, 99):7.2f} ms"
+        if sample:
+            correct = sum(int(np.argmax(predict_image(img).mean(axis=0)) == label) for img, label in sample)
+            line += f" | top-1 {correct / len(sample):.1%} on {len(sample)} val images"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
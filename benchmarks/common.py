@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import time
+import resource
+import numpy as np
+import tensorflow as tf
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from src.model_builder import build_model
+
+
+def load_benchmark_model():
+    """Uses the trained model when available, otherwise a random-weight model of the same shape."""
+    if os.path.exists(config.MODEL_PATH):
+        print(f"⚙️ Loading {config.MODEL_PATH}")
+        return tf.keras.models.load_model(config.MODEL_PATH)
+
+    with open(config.CLASS_INDICES_PATH, 'r') as f:
+        num_classes = len(json.load(f))
+    print(f"⚠️ No trained model found. Using random weights ({num_classes} classes).")
+    return build_model(num_classes=num_classes, img_size=config.IMG_SIZE, weights=None)
+
+
+def time_calls(fn, arg, iterations):
+    """Returns per-call latencies in milliseconds."""
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(arg)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (Linux reports ru_maxrss in KB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_val_sample(limit):
+    """Returns [(image_array, true_class_idx)] drawn evenly from config.VAL_DIR, or [] if absent."""
+    if not os.path.exists(config.VAL_DIR):
+        return []
+    with open(config.CLASS_INDICES_PATH, 'r') as f:
+        name_to_idx = {v: int(k) for k, v in json.load(f).items()}
+
+    per_class = max(1, limit // max(1, len(name_to_idx)))
+    sample = []
+    for class_name, idx in name_to_idx.items():
+        class_dir = os.path.join(config.VAL_DIR, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        for fname in sorted(os.listdir(class_dir))[:per_class]:
+            img = tf.keras.utils.load_img(os.path.join(class_dir, fname))
+            sample.append((tf.keras.utils.img_to_array(img), idx))
+    return sample
+
+
+LESION_COLORS = [(110, 80, 30), (200, 190, 60), (40, 30, 25), (150, 60, 120), (230, 230, 230)]
+
+
+def synthetic_leaf_image(rng, height, width, lesion_color=(110, 80, 30)):
+    """Green-ish textured image with an elliptical 'leaf' and a few lesions, as uint8 HxWx3."""
+    yy, xx = np.mgrid[0:height, 0:width]
+    img = rng.normal(60, 20, (height, width, 3))
+    leaf = ((yy - height / 2) / (height * 0.4)) ** 2 + ((xx - width / 2) / (width * 0.3)) ** 2 < 1
+    img[leaf] = rng.normal((50, 140, 40), 18, (int(leaf.sum()), 3))
+    for _ in range(rng.integers(3, 12)):
+        cy, cx, r = rng.integers(0, height), rng.integers(0, width), rng.integers(3, max(4, height // 25))
+        img[(yy - cy) ** 2 + (xx - cx) ** 2 < r * r] = lesion_color
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def make_synthetic_dataset(root, num_classes=3, per_class=64, size=(375, 500), seed=0):
+    """
+    Writes a class-per-folder JPEG tree (PlantVillage-like sizes) and returns `root`.
+    Each class gets its own lesion colour, so a model can actually learn to separate them.
+    """
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    for c in range(num_classes):
+        class_dir = os.path.join(root, f"class_{c}")
+        os.makedirs(class_dir, exist_ok=True)
+        for i in range(per_class):
+            img = synthetic_leaf_image(rng, *size, lesion_color=LESION_COLORS[c % len(LESION_COLORS)])
+            Image.fromarray(img).save(os.path.join(class_dir, f"{i:05d}.jpg"), quality=90)
+    return root
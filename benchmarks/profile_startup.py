@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+# Connect to config
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+
+def import_profile(module, top):
+    """Runs `python -X importtime -c 'import <module>'` in a fresh process and returns the slowest imports."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top], proc.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the web app's startup path.")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    # 1. Import cost of the modules a worker loads before it can listen
+    for module in ("src.inference_pipeline", "web.app"):
+        rows, code = import_profile(module, args.top)
+        print(f"\n📦 import {module}" + ("" if code == 0 else f" (exit code {code})"))
+        for cumulative_us, self_us, name in rows:
+            print(f"   {cumulative_us / 1000:8.1f} ms cumulative | {self_us / 1000:7.1f} ms self | {name}")
+
+    # 2. Model load + warm-up, measured the same way the web app does it
+    import config
+    if not os.path.exists(config.MODEL_PATH):
+        print(f"\nℹ️  Model load skipped: {config.MODEL_PATH} not found.")
+        return
+    config.WARMUP_ON_START = False
+    start = time.perf_counter()
+    from src.inference_pipeline import get_predictor, readiness
+    import_s = time.perf_counter() - start
+    get_predictor()
+    state = readiness()
+    print(f"\n⏱️  import {import_s:.2f}s | model load {state['load_seconds']}s | warm-up {state['warmup_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
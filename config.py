@@ -10,21 +10,43 @@ DATA_DIR = os.path.join(BASE_DIR, 'data')
 RAW_DATA_DIR = os.path.join(DATA_DIR, 'raw')       # Put your PlantVillage dataset here
 TRAIN_DIR = os.path.join(DATA_DIR, 'train')
 VAL_DIR = os.path.join(DATA_DIR, 'val')
+SHARDS_DIR = os.path.join(DATA_DIR, 'shards')     # Pre-decoded training shards (src/shards.py)
+FEATURES_DIR = os.path.join(DATA_DIR, 'features') # Cached backbone features (src/feature_cache.py)
+SPLIT_MANIFEST_PATH = os.path.join(DATA_DIR, 'split_manifest.json')  # Train/val assignment + hash cache
 
 # Model Paths
 MODELS_DIR = os.path.join(BASE_DIR, 'models')
 MODEL_PATH = os.path.join(MODELS_DIR, 'efficientnet_best.h5')
 CLASS_INDICES_PATH = os.path.join(MODELS_DIR, 'class_indices.json')
 DISEASE_INFO_PATH = os.path.join(MODELS_DIR, 'disease_info.json') # 🆕 Links to remedies
+CHECKPOINT_DIR = os.path.join(MODELS_DIR, 'checkpoints')  # Resumable training state + progress journal
+KNOWLEDGE_DIR = os.path.join(MODELS_DIR, 'knowledge')        # Compiled knowledge base, one file per locale
+TRANSLATIONS_DIR = os.path.join(MODELS_DIR, 'translations')  # <locale>.json: translated disease_info.py entries
+DEFAULT_LOCALE = "en"   # Language of disease_info.py
 
 # ==========================================
 # 2. MODEL HYPERPARAMETERS
 # ==========================================
 IMG_SIZE = (224, 224)   # Standard for EfficientNet
-BATCH_SIZE = 32
+BATCH_SIZE = 32         # Per replica when training is distributed (global batch = BATCH_SIZE * replicas)
 EPOCHS = 25             # Increased for better convergence
 LEARNING_RATE = 0.001   # Start fast
 FINE_TUNE_LR = 1e-5     # Slow down for fine-tuning later
+PRECISION_POLICY = "float32"  # "float32", "mixed_float16" or "mixed_bfloat16" (softmax output stays float32)
+JIT_COMPILE = False     # XLA-compile the train step (both phases)
+DISTRIBUTION_STRATEGY = None  # None, "mirrored" (local GPUs / CPU_REPLICAS) or "multi_worker" (TF_CONFIG)
+CPU_REPLICAS = None     # "mirrored" on a CPU-only box: split the CPU into this many replicas
+RESUME_TRAINING = True  # Re-running train_advanced.py continues an interrupted run (--fresh starts over)
+CHECKPOINT_EVERY_EPOCHS = 1  # Full training-state checkpoint interval
+SEED = 42               # Shuffling + augmentation seed (reproducible runs)
+DATASET_CACHE = None    # Cache decoded images: None (off), "memory", or a directory for on-disk cache files
+CACHE_SHUFFLE_BUFFER = 2048  # Shuffle window used after a DATASET_CACHE (~300 MB of uint8 images)
+SPLIT_MODE = "hardlink"  # How preprocess.py fills train/val: "hardlink", "symlink" or "copy"
+SPLIT_WORKERS = 8       # Parallel hashing / linking threads
+CACHED_FEATURES_PHASE1 = False  # Phase 1: train the head on pooled backbone features computed once
+FEATURE_AUG_COPIES = 2  # Extra augmented feature passes per training image (0 = clean images only)
+USE_SHARDS = False      # Train from pre-decoded uint8 shards (src/shards.py) instead of JPEGs
+SHARD_SIZE = 2048       # Images per shard file (~300 MB at 224x224)
 
 # ==========================================
 # 3. PRO REQUIREMENTS (ROBUSTNESS)
@@ -37,4 +59,96 @@ def get_classes():
     if os.path.exists(TRAIN_DIR):
         # Only count directories, ignore .DS_Store or hidden files
         return sorted([d for d in os.listdir(TRAIN_DIR) if os.path.isdir(os.path.join(TRAIN_DIR, d))])
-    return []
\ No newline at end of file
+    return []
+
+# ==========================================
+# 4. INFERENCE SERVING
+# ==========================================
+# Load + warm the model on a background thread when the web app starts (see /readyz).
+# With gunicorn --preload, set this to False and warm up in a post_fork hook instead.
+WARMUP_ON_START = True
+
+# Model backend: "keras" (MODEL_PATH) or "tflite" (TFLITE_MODEL_PATH, see src/export_tflite.py)
+MODEL_BACKEND = "keras"
+TFLITE_MODEL_PATH = os.path.join(MODELS_DIR, 'efficientnet_int8.tflite')
+TFLITE_NUM_THREADS = None      # None = let the runtime decide
+TFLITE_REPRESENTATIVE_IMAGES = 200  # Calibration images drawn from VAL_DIR for full-integer quantization
+
+# Hot-swap: new model versions are loaded + warmed next to the active one, then swapped in
+MODEL_POOL_SIZE = 2            # Versions kept loaded (active + previous, for instant roll back)
+MODEL_WATCH_INTERVAL = None    # Seconds between checks of the model file for a new version (None = off)
+ADMIN_TOKEN = None             # Enables POST /api/v1/model (X-Admin-Token header); None = disabled
+
+# How the model is called: "keras" (model.predict), "direct" (model(x)) or "compiled" (tf.function)
+INFERENCE_MODE = "compiled"
+
+# Test-Time Augmentation: "full" (4 views), "flip" (cheap 2 views) or "none" (fast path)
+TTA_MODE = "full"
+TTA_PRESETS = {
+    "none": ("original",),
+    "flip": ("original", "flip"),
+    "full": ("original", "flip", "rot90", "bright"),
+}
+
+# TensorFlow thread pools per process (None = TensorFlow default, every core). With several
+# model-owning processes on one host, give each about cores / processes intra-op threads.
+TF_INTRA_OP_THREADS = None
+TF_INTER_OP_THREADS = None
+
+# Shared inference server (python src/inference_server.py): INFERENCE_SERVER_PROCESSES processes own
+# the model; web workers send them decoded tensors over shared memory instead of each loading a copy
+# (and then never import TensorFlow themselves)
+INFERENCE_SERVER = None          # Unix socket path, e.g. "/tmp/leaf-inference.sock"; None = model in every worker
+INFERENCE_SERVER_PROCESSES = 1   # Model copies on the host; web workers are spread over them by pid
+INFERENCE_SERVER_CONNECT_TIMEOUT = 60  # Seconds a web worker waits for the server at startup
+
+# Decode uploads near the model input size (JPEG DCT scaling) and resize once; the TTA views
+# and the cache key are then built from the small IMG_SIZE tensor instead of the full photo
+FAST_DECODE = True
+
+# Micro-batching: coalesce TTA batches from concurrent requests into one forward pass
+MICRO_BATCHING = True
+MAX_BATCH_SIZE = 32      # Images per forward pass (8 requests x 4 TTA views)
+MAX_BATCH_WAIT_MS = 5    # How long the first request waits for company
+
+# Uploads are predicted straight from memory; keeping a copy on disk is optional and async
+SAVE_UPLOADS = True
+
+# Upload store: content-addressed files in sharded folders (<kind>/<first 2 hash chars>/<hash>.jpg)
+UPLOAD_DIR = os.path.join(BASE_DIR, 'web', 'static', 'uploads')
+UPLOAD_AUDIT_SIZE = 1024             # Only a downscaled copy of each upload is kept, for audit (longest side)
+UPLOAD_AUDIT_QUALITY = 85
+UPLOAD_QUOTA_BYTES = 2 * 1024 ** 3   # Oldest files are evicted beyond this, down to 90% of it (0 = no quota)
+UPLOAD_RETENTION_DAYS = 30           # Files not uploaded again for this long are deleted (0 = keep)
+UPLOAD_COMPACT_INTERVAL = 600        # Seconds between background compaction / eviction passes (0 = off)
+
+# Result page and static files
+RENDER_CACHE = True        # Render result.html once per class; requests only fill in image / confidence / version
+THUMBNAIL_SIZE = 480       # Longest side of the result-page preview (the full upload is never sent back)
+THUMBNAIL_QUALITY = 75
+STATIC_MAX_AGE = 3600      # Cache-Control max-age of /static files, in seconds
+UPLOAD_MAX_AGE = 31536000  # Uploads and thumbnails are stored under their content hash, so they never change
+
+# Prediction cache (content hash of the decoded image + model version + TTA mode)
+PREDICTION_CACHE = True
+CACHE_MAX_ENTRIES = 10000
+CACHE_TTL_SECONDS = 3600
+CACHE_DIR = None         # e.g. os.path.join(BASE_DIR, 'cache', 'predictions') to share across gunicorn workers
+CACHE_DIR_MAX_BYTES = 256 * 1024 * 1024  # Oldest CACHE_DIR files are deleted beyond this (0 = only expired ones)
+CACHE_SWEEP_EVERY = 1000  # Disk writes between CACHE_DIR sweeps (expired files + size cap)
+
+# Async serving (uvicorn web.asgi:app): bounded inference pool with 503 backpressure
+ASYNC_INFERENCE_WORKERS = 4    # Threads running decode + inference
+ASYNC_QUEUE_SIZE = 16          # Requests allowed to wait for a worker before we answer 503
+ASYNC_RETRY_AFTER_SECONDS = 2
+MAX_UPLOAD_BYTES = 32 * 1024 * 1024
+
+# Serving metrics on /metrics (Prometheus text format): per-stage latency, batch sizes, queue depth, outcomes
+METRICS_ENABLED = True   # False = no timing on the hot path and /metrics answers 404
+
+# JSON API (/api/v1/predict)
+API_MAX_FILES = 16       # Images accepted in one request (all run as one model batch)
+
+# Offline batch prediction (src/predict_batch.py)
+PREDICT_BATCH_SIZE = 32  # Images per model call (x TTA views)
+DECODE_WORKERS = 4       # Parallel image decoders
@@ -0,0 +1,135 @@
+import threading
+import queue
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Request-coalescing scheduler for model inference.
+
+    Concurrent callers submit their own TTA batch; a single background thread
+    gathers them into one forward pass (up to `max_batch_size` images or
+    `max_wait_ms` of waiting, whichever comes first) and hands every caller
+    back its own slice of the predictions. A request that doesn't fit in the
+    current batch opens the next one (a single request larger than
+    `max_batch_size` still runs on its own).
+
+    `on_batch(images, requests, queue_depth, waits)` is called before every forward
+    pass (waits = seconds each request spent queued), e.g. for metrics.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5, on_batch=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.on_batch = on_batch
+
+        self._queue = queue.Queue()
+        self._carry = None  # Request that didn't fit the previous batch; it starts the next one
+        self._stopped = threading.Event()
+        self._closing = False
+        self._submit_lock = threading.Lock()  # Orders submissions against the stop marker
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, batch):
+        """Queues a batch of images and returns a Future for its predictions."""
+        future = Future()
+        with self._submit_lock:
+            closing = self._closing
+            if not closing and not self._stopped.is_set():
+                self._queue.put((np.asarray(batch), future, time.perf_counter()))
+                return future
+        if closing:
+            # Draining (e.g. a model being swapped out): serve late callers directly
+            try:
+                future.set_result(self.predict_fn(np.asarray(batch)))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            future.set_exception(RuntimeError("MicroBatcher is stopped"))
+        return future
+
+    def predict(self, batch, timeout=None):
+        """Blocking helper: submit() and wait for the result."""
+        return self.submit(batch).result(timeout=timeout)
+
+    def stop(self, drain=False):
+        """Stops the worker. With drain=True, everything already queued is still predicted."""
+        with self._submit_lock:
+            if drain:
+                self._closing = True
+            else:
+                self._stopped.set()
+            self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        # Block for the first request, then keep gathering until full or the deadline passes
+        first, self._carry = self._carry, None
+        if first is None:
+            first = self._queue.get()
+        if first is None:
+            self._stopped.set()
+            return []
+        pending = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Let the outer loop see the stop signal
+                break
+            if size + len(item[0]) > self.max_batch_size:
+                self._carry = item
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self):
+        while not self._stopped.is_set():
+            pending = self._collect()
+            if not pending:
+                continue
+
+            # 1. One forward pass for everyone
+            batches = [b for b, _, _ in pending]
+            if self.on_batch is not None:
+                now = time.perf_counter()
+                self.on_batch(sum(len(b) for b in batches), len(pending), self._queue.qsize(),
+                              [now - submitted for _, _, submitted in pending])
+            try:
+                predictions = self.predict_fn(np.concatenate(batches, axis=0))
+            except Exception as e:
+                for _, future, _ in pending:
+                    future.set_exception(e)
+                continue
+
+            # 2. Scatter each caller's slice back
+            offset = 0
+            for batch, future, _ in pending:
+                future.set_result(predictions[offset:offset + len(batch)])
+                offset += len(batch)
+
+        # Fail anything still waiting after stop()
+        if self._carry is not None:
+            self._carry[1].set_exception(RuntimeError("MicroBatcher is stopped"))
+            self._carry = None
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].set_exception(RuntimeError("MicroBatcher is stopped"))
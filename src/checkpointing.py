@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+import tensorflow as tf
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from src.distributed import is_chief
+
+# config.CHECKPOINT_DIR holds:
+#   journal.json                    phase / epoch progress of the current run
+#   <phase>_e<epoch>.weights.h5     full training state (weights + optimizer, incl. learning rate)
+#   <phase>_e<epoch>.json           epoch, callback progress and RNG seed belonging to that state
+#   <phase>_e<epoch>_best.npz       EarlyStopping's best weights so far (restore_best_weights)
+#   <phase>_final.npz               weights at the end of a finished phase
+JOURNAL = "journal.json"
+
+# Callback attributes that make up their progress (the rest is configuration)
+CALLBACK_STATE = {
+    "EarlyStopping": ("wait", "best", "best_epoch", "stopped_epoch"),
+    "ReduceLROnPlateau": ("wait", "best", "cooldown_counter"),
+    "ModelCheckpoint": ("best",),
+}
+
+
+def epoch_seed(phase, epoch):
+    """Seed for shuffling / augmentation / dropout when (re)starting `phase` at `epoch`."""
+    if epoch == 0:
+        return config.SEED
+    return config.SEED + 1000 * int(phase.replace("phase", "")) + epoch
+
+
+def save_arrays(path, arrays):
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, *arrays)
+    os.replace(tmp, path)
+
+
+def load_arrays(path):
+    with np.load(path) as data:
+        return [data[f"arr_{i}"] for i in range(len(data.files))]
+
+
+def _write_json(path, payload):
+    # Write-then-rename: a crash mid-write leaves the previous file intact
+    with open(path + ".tmp", 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+class TrainingJournal:
+    """
+    Progress of train_advanced.py: per phase, the last finished epoch, the last checkpoint
+    and whether the phase is done, plus a log of every finished epoch. A journal written
+    for a different dataset / model setup is ignored.
+    """
+
+    def __init__(self, directory, key, fresh=False):
+        self.directory = directory
+        self.path = os.path.join(directory, JOURNAL)
+        self.state = {"key": key, "phases": {}, "log": []}
+        os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(self.path) and not fresh:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+            if saved.get("key") == json.loads(json.dumps(key)):
+                self.state = saved
+            else:
+                print("ℹ️  Classes or training settings changed since the last run; starting from scratch.")
+
+    def phase(self, name):
+        return self.state["phases"].setdefault(name, {"epochs_done": 0, "checkpoint": None, "done": False})
+
+    def is_done(self, name):
+        return self.phase(name)["done"]
+
+    def checkpoint(self, name):
+        """The latest checkpoint entry of an unfinished phase ({"epoch", "weights", "state"}) or None."""
+        entry = self.phase(name)["checkpoint"]
+        if entry and os.path.exists(os.path.join(self.directory, entry["weights"])):
+            return entry
+        return None
+
+    def record_epoch(self, name, epoch, logs):
+        self.phase(name)["epochs_done"] = epoch + 1
+        metrics = {k: float(v) for k, v in (logs or {}).items() if np.ndim(v) == 0}
+        self.state["log"].append({"phase": name, "epoch": epoch + 1, "finished_at": time.time(), **metrics})
+        self.save()
+
+    def record_checkpoint(self, name, entry):
+        previous = self.phase(name)["checkpoint"]
+        self.phase(name)["checkpoint"] = entry
+        self.save()
+        if previous and previous != entry:
+            self._remove(previous)
+
+    def mark_done(self, name, final_weights, model_checkpoint_best=None):
+        phase = self.phase(name)
+        previous = phase["checkpoint"]
+        phase.update(done=True, checkpoint=None, final=final_weights, model_checkpoint_best=model_checkpoint_best)
+        self.save()
+        if previous:
+            self._remove(previous)
+
+    def final_weights(self, name):
+        return os.path.join(self.directory, self.phase(name)["final"])
+
+    def save(self):
+        if is_chief():
+            _write_json(self.path, self.state)
+
+    def _remove(self, entry):
+        for key in ("weights", "state", "best"):
+            path = os.path.join(self.directory, entry.get(key) or "")
+            if entry.get(key) and os.path.exists(path):
+                os.remove(path)
+
+
+class TrainingCheckpoint(tf.keras.callbacks.Callback):
+    """
+    Saves the full training state of a phase every `every` epochs and marks the phase done
+    in the journal when fit() ends. On a resumed fit() (initial_epoch > 0) it restores the
+    progress of the `tracked` callbacks, so it must be listed after them.
+    """
+
+    def __init__(self, journal, phase, tracked, every=1, resume_state=None):
+        super().__init__()
+        self.journal = journal
+        self.phase = phase
+        self.tracked = [cb for cb in tracked if type(cb).__name__ in CALLBACK_STATE]
+        self.every = max(1, every)
+        self.resume_state = resume_state
+
+    def on_train_begin(self, logs=None):
+        # The tracked callbacks have just reset themselves in their own on_train_begin
+        if not self.resume_state:
+            return
+        for cb, saved in zip(self.tracked, self.resume_state["callbacks"]):
+            for attr, value in saved.items():
+                setattr(cb, attr, value)
+            if type(cb).__name__ == "EarlyStopping" and self.resume_state.get("best"):
+                cb.best_weights = load_arrays(os.path.join(self.journal.directory, self.resume_state["best"]))
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.journal.record_epoch(self.phase, epoch, logs)
+        if (epoch + 1) % self.every == 0:
+            self.save(epoch + 1)
+
+    def on_train_end(self, logs=None):
+        # Runs after EarlyStopping restored the best weights
+        finish_phase(self.journal, self.phase, self.model, self.tracked)
+
+    def save(self, epoch):
+        if not is_chief():
+            return
+        stem = f"{self.phase}_e{epoch:04d}"
+        entry = {"epoch": epoch, "weights": f"{stem}.weights.h5", "state": f"{stem}.json", "best": None}
+        directory = self.journal.directory
+
+        self.model.save_weights(os.path.join(directory, entry["weights"]))
+        early_stopping = [cb for cb in self.tracked if type(cb).__name__ == "EarlyStopping"]
+        if early_stopping and early_stopping[0].best_weights is not None:
+            entry["best"] = f"{stem}_best.npz"
+            save_arrays(os.path.join(directory, entry["best"]), early_stopping[0].best_weights)
+
+        _write_json(os.path.join(directory, entry["state"]), {
+            "phase": self.phase,
+            "epoch": epoch,
+            "rng_seed": epoch_seed(self.phase, epoch),
+            "best": entry["best"],
+            "callbacks": [{attr: _to_json(getattr(cb, attr)) for attr in CALLBACK_STATE[type(cb).__name__]}
+                          for cb in self.tracked],
+        })
+        # The journal only points at a checkpoint once all of its files are written
+        self.journal.record_checkpoint(self.phase, entry)
+
+
+def _to_json(value):
+    return value.item() if isinstance(value, np.generic) else float(value) if hasattr(value, "numpy") else value
+
+
+def finish_phase(journal, phase, model, tracked=()):
+    """Stores the weights a finished phase ended with and marks it done."""
+    final = f"{phase}_final.npz"
+    if is_chief():
+        save_arrays(os.path.join(journal.directory, final), model.get_weights())
+    # ModelCheckpoint's best val_loss carries over into the next phase (it only saves improvements)
+    best = [cb.best for cb in tracked if type(cb).__name__ == "ModelCheckpoint"]
+    journal.mark_done(phase, final, _to_json(best[0]) if best else None)
+
+
+def restore(model, journal, phase):
+    """
+    Loads the latest checkpoint of an unfinished phase into a compiled `model`.
+    Returns (initial_epoch, saved callback state) — (0, None) when there is nothing to resume.
+    """
+    entry = journal.checkpoint(phase)
+    if entry is None:
+        return 0, None
+    if not model.optimizer.built:
+        model.optimizer.build(model.trainable_variables)  # Optimizer slots must exist before loading
+    model.load_weights(os.path.join(journal.directory, entry["weights"]))
+    with open(os.path.join(journal.directory, entry["state"]), 'r') as f:
+        state = json.load(f)
+    print(f"♻️  Resuming {phase} from the checkpoint after epoch {entry['epoch']}")
+    return entry["epoch"], state
@@ -0,0 +1,149 @@
+import os
+import sys
+import math
+import numpy as np
+import tensorflow as tf
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# flow_from_directory's file types, minus .ppm/.tif/.tiff: tf.io.decode_image can't read them
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+class ImageFolder:
+    """
+    Index of a class-per-folder image tree, built the same way flow_from_directory does
+    (sorted class folders, sorted files), so `classes`, `class_indices` and `num_classes`
+    are identical to the old generator's attributes.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        class_names = sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d)))
+        self.class_indices = {name: i for i, name in enumerate(class_names)}
+        self.num_classes = len(class_names)
+
+        paths, labels = [], []
+        for name in class_names:
+            class_dir = os.path.join(directory, name)
+            for root, _, files in sorted(os.walk(class_dir, followlinks=True)):
+                for fname in sorted(files):
+                    if fname.lower().endswith(IMAGE_EXTENSIONS):
+                        paths.append(os.path.join(root, fname))
+                        labels.append(self.class_indices[name])
+
+        self.filepaths = paths
+        self.classes = np.array(labels, dtype=np.int32)
+        self.samples = len(paths)
+        print(f"Found {self.samples} images belonging to {self.num_classes} classes.")
+
+
+def decode_and_resize(path, img_size=None):
+    img_size = img_size or config.IMG_SIZE
+    img = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+    img.set_shape([None, None, 3])
+    return tf.image.resize(tf.cast(img, tf.float32), img_size)
+
+
+def random_affine(images, seed):
+    """
+    Batched, in-graph equivalent of the old ImageDataGenerator settings:
+    rotation 40°, width/height shift 0.3, shear 0.3°, zoom 0.3, horizontal flip, nearest fill.
+
+    Like ImageDataGenerator, all geometric augmentations are composed into one affine
+    matrix per image, so the batch is resampled once instead of once per augmentation.
+    `seed` is a [2] int tensor (stateless RNG), which keeps runs reproducible.
+    """
+    batch = tf.shape(images)[0]
+    height = tf.cast(tf.shape(images)[1], tf.float32)
+    width = tf.cast(tf.shape(images)[2], tf.float32)
+    seeds = tf.random.experimental.stateless_split(seed, num=7)
+
+    def uniform(i, low, high):
+        return tf.random.stateless_uniform([batch], seeds[i], low, high)
+
+    theta = uniform(0, -40.0, 40.0) * (math.pi / 180)
+    shear = uniform(1, -0.3, 0.3) * (math.pi / 180)  # shear_range is an angle in degrees
+    zoom_x = uniform(2, 0.7, 1.3)
+    zoom_y = uniform(3, 0.7, 1.3)
+    shift_x = uniform(4, -0.3, 0.3) * width
+    shift_y = uniform(5, -0.3, 0.3) * height
+    flip = tf.where(uniform(6, 0.0, 1.0) < 0.5, -1.0, 1.0)
+
+    # A = Rotation @ Shear @ Zoom @ Flip, mapping output pixels back to input pixels
+    cos_t, sin_t = tf.cos(theta), tf.sin(theta)
+    a00 = cos_t * zoom_x * flip
+    a01 = (-cos_t * tf.sin(shear) - sin_t * tf.cos(shear)) * zoom_y
+    a10 = sin_t * zoom_x * flip
+    a11 = (-sin_t * tf.sin(shear) + cos_t * tf.cos(shear)) * zoom_y
+
+    # Rotate / zoom about the image centre, then shift
+    cx, cy = (width - 1) / 2, (height - 1) / 2
+    offset_x = cx - a00 * cx - a01 * cy - shift_x
+    offset_y = cy - a10 * cx - a11 * cy - shift_y
+
+    zeros = tf.zeros([batch])
+    transforms = tf.stack([a00, a01, offset_x, a10, a11, offset_y, zeros, zeros], axis=1)
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=images, transforms=transforms, output_shape=tf.shape(images)[1:3],
+        fill_value=0.0, interpolation="BILINEAR", fill_mode="NEAREST")
+
+
+def augment_batches(ds, seed):
+    """Applies random_affine to a dataset of (images, labels) batches."""
+    # A fresh stateless seed per batch (and per epoch) from a seeded random stream
+    seeds = tf.data.Dataset.random(seed=seed, rerandomize_each_iteration=True).batch(2)
+    ds = tf.data.Dataset.zip((ds, seeds))
+    return ds.map(lambda batch, s: (random_affine(batch[0], s), batch[1]), num_parallel_calls=AUTOTUNE)
+
+
+def _cache(ds, cache, name):
+    if cache is None:
+        return ds
+    if cache == "memory":
+        return ds.cache()
+    os.makedirs(cache, exist_ok=True)
+    return ds.cache(os.path.join(cache, name))
+
+
+def build_dataset(directory, training, batch_size=None, seed=None, cache=None, num_shards=1, shard_index=0):
+    """
+    Returns (tf.data.Dataset of (images, one_hot_labels), ImageFolder).
+    Decoding runs in parallel, augmentation runs batched in the graph, and the
+    next batches are prefetched while the model trains.
+    With num_shards > 1 only every num_shards-th file (from shard_index) is read,
+    so distributed workers each decode a disjoint part of the split.
+    """
+    batch_size = batch_size or config.BATCH_SIZE
+    seed = config.SEED if seed is None else seed
+    folder = ImageFolder(directory)
+
+    ds = tf.data.Dataset.from_tensor_slices((folder.filepaths, folder.classes))
+    if num_shards > 1:
+        ds = ds.shard(num_shards, shard_index)
+    if cache is None:
+        if training:
+            ds = ds.shuffle(ds.cardinality(), seed=seed, reshuffle_each_iteration=True)
+        ds = ds.map(lambda path, label: (decode_and_resize(path), label),
+                    num_parallel_calls=AUTOTUNE, deterministic=True)
+    else:
+        # Cache decoded (un-augmented) uint8 images so later epochs skip JPEG decoding.
+        # The cache replays a fixed order, so shuffling happens after it.
+        ds = ds.map(lambda path, label: (tf.cast(tf.round(decode_and_resize(path)), tf.uint8), label),
+                    num_parallel_calls=AUTOTUNE, deterministic=True)
+        name = os.path.basename(os.path.normpath(directory))
+        ds = _cache(ds, cache, name if num_shards == 1 else f"{name}_{shard_index}of{num_shards}")
+        if training:
+            ds = ds.shuffle(config.CACHE_SHUFFLE_BUFFER, seed=seed, reshuffle_each_iteration=True)
+        ds = ds.map(lambda img, label: (tf.cast(img, tf.float32), label), num_parallel_calls=AUTOTUNE)
+
+    ds = ds.map(lambda img, label: (img, tf.one_hot(label, folder.num_classes)), num_parallel_calls=AUTOTUNE)
+    ds = ds.batch(batch_size)
+
+    if training:
+        ds = augment_batches(ds, seed)
+
+    return ds.prefetch(AUTOTUNE), folder
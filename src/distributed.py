@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import socket
+import argparse
+import subprocess
+import tempfile
+import tensorflow as tf
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# config.DISTRIBUTION_STRATEGY:
+#   None            one process, default device (same as before)
+#   "mirrored"      one process, synchronous replicas over local GPUs (or config.CPU_REPLICAS logical CPUs)
+#   "multi_worker"  one process per worker, cluster described by the TF_CONFIG environment variable
+# A process started with a multi-worker TF_CONFIG (e.g. by launch_local) always uses "multi_worker".
+STRATEGIES = (None, "mirrored", "multi_worker")
+
+# The multi-worker fit() below works around Keras 3 gaps through private Model attributes.
+# It has been run with these Keras releases (requirements.txt pins the oldest); anything
+# outside the range is refused up front instead of failing (or silently misbehaving) mid-run.
+TESTED_KERAS_RANGE = ((3, 13), (3, 15))  # (major, minor), inclusive
+
+
+def check_keras_version(version=None):
+    """Raises RuntimeError unless `version` (default: the installed Keras) is in TESTED_KERAS_RANGE."""
+    if version is None:
+        import keras
+        version = keras.__version__
+    major_minor = tuple(int(part) for part in version.split(".")[:2])
+    low, high = TESTED_KERAS_RANGE
+    if not low <= major_minor <= high:
+        raise RuntimeError(
+            f"Multi-worker training has been tested with Keras {low[0]}.{low[1]}-{high[0]}.{high[1]}, "
+            f"not {version}. Install a tested version (requirements.txt), or re-check "
+            f"src/distributed.fit() and extend TESTED_KERAS_RANGE.")
+
+
+def get_strategy(name=None):
+    """Creates the configured tf.distribute strategy (None -> the default, no-op strategy)."""
+    name = config.DISTRIBUTION_STRATEGY if name is None else name
+    if worker_info()[0] > 1:
+        name = "multi_worker"
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown distribution strategy '{name}'. Choose from {STRATEGIES}.")
+
+    if name is None:
+        return tf.distribute.get_strategy()
+
+    if name == "mirrored":
+        gpus = tf.config.list_physical_devices("GPU")
+        if gpus or not config.CPU_REPLICAS:
+            return tf.distribute.MirroredStrategy()
+        # CPU-only box: split the CPU into logical devices, one replica each
+        cpu = tf.config.list_physical_devices("CPU")[0]
+        tf.config.set_logical_device_configuration(cpu, [tf.config.LogicalDeviceConfiguration()] * config.CPU_REPLICAS)
+        devices = [d.name for d in tf.config.list_logical_devices("CPU")]
+        return tf.distribute.MirroredStrategy(devices=devices,
+                                              cross_device_ops=tf.distribute.ReductionToOneDevice())
+
+    if "TF_CONFIG" not in os.environ:
+        raise RuntimeError("DISTRIBUTION_STRATEGY='multi_worker' needs TF_CONFIG (see `python src/distributed.py --help`).")
+    check_keras_version()  # Before any data loading or training starts
+    return tf.distribute.MultiWorkerMirroredStrategy()
+
+
+def worker_info():
+    """(number of workers, this worker's index), read from TF_CONFIG. (1, 0) outside a cluster."""
+    tf_config = json.loads(os.environ.get("TF_CONFIG", "{}"))
+    cluster = tf_config.get("cluster", {})
+    task = tf_config.get("task", {})
+    if not cluster:
+        return 1, 0
+    roles = [r for r in ("chief", "worker") if r in cluster]
+    index = 0
+    for role in roles:
+        if role == task.get("type"):
+            return sum(len(cluster[r]) for r in roles), index + task.get("index", 0)
+        index += len(cluster[role])
+    return sum(len(cluster[r]) for r in roles), 0
+
+
+def is_chief():
+    """Only the chief writes models, class maps and generated files."""
+    return worker_info()[1] == 0
+
+
+def writable_path(path):
+    """
+    Where a file written by every worker goes: the chief writes `path`, the others a
+    throwaway copy (for callbacks such as ModelCheckpoint that run on all workers).
+    """
+    if is_chief():
+        return path
+    scratch = os.path.join(tempfile.gettempdir(), f"worker_{worker_info()[1]}")
+    os.makedirs(scratch, exist_ok=True)
+    return os.path.join(scratch, os.path.basename(path))
+
+
+def with_sample_weights(ds, class_weights):
+    """
+    Turns class weights into per-sample weights inside the input pipeline
+    (Keras cannot apply `class_weight` to an already distributed dataset).
+    """
+    table = tf.constant([class_weights.get(i, 1.0) for i in range(max(class_weights) + 1)], tf.float32)
+    return ds.map(lambda x, y: (x, y, tf.gather(table, tf.argmax(y, axis=-1))), num_parallel_calls=tf.data.AUTOTUNE)
+
+
+def distribute_dataset(strategy, make_dataset, split_dir, training, class_weights=None, seed=None):
+    """
+    Builds one input pipeline per worker. Each worker reads its own 1/N of the split
+    and batches at the per-replica size, so every replica gets config.BATCH_SIZE images
+    per step (the global batch is BATCH_SIZE * num_replicas_in_sync).
+
+    Returns (distributed dataset, ImageFolder, steps per epoch).
+    """
+    num_workers, worker_index = worker_info()
+    replicas = strategy.num_replicas_in_sync
+    global_batch = config.BATCH_SIZE * replicas
+    folder_box = []
+
+    def dataset_fn(input_context):
+        per_replica = input_context.get_per_replica_batch_size(global_batch)
+        # MultiWorkerMirroredStrategy: one pipeline per worker; MirroredStrategy: one pipeline in total
+        num_shards = input_context.num_input_pipelines
+        shard_index = input_context.input_pipeline_id
+        ds, folder = make_dataset(split_dir, training, seed, batch_size=per_replica,
+                                  num_shards=num_shards, shard_index=shard_index)
+        folder_box.append(folder)
+        # Endless stream of full batches: every replica needs the same batch shape, and every
+        # worker the same number of steps (uneven shards would otherwise stall the all-reduce)
+        ds = ds.repeat().unbatch().batch(per_replica, drop_remainder=True)
+        if class_weights is not None:
+            ds = with_sample_weights(ds, class_weights)
+        return ds.prefetch(tf.data.AUTOTUNE)
+
+    options = tf.distribute.InputOptions(experimental_fetch_to_device=True)
+    dist_ds = strategy.distribute_datasets_from_function(dataset_fn, options)
+    folder = folder_box[0]
+    steps = max(1, folder.samples // global_batch)
+    print(f"   Worker {worker_index + 1}/{num_workers}: {replicas} replicas in sync, "
+          f"global batch {global_batch} ({config.BATCH_SIZE} per replica), {steps} steps/epoch")
+    return dist_ds, folder, steps
+
+
+def _with_batch_axis(step):
+    """Wraps a train / test step so every log value is a [1] tensor instead of a scalar."""
+    def wrapped(data):
+        return {key: tf.reshape(value, [1]) for key, value in step(data).items()}
+    return wrapped
+
+
+def fit(model, strategy, *args, **kwargs):
+    """
+    model.fit() under `strategy`.
+
+    Keras 3 cannot run fit() on a multi-worker strategy as-is: building the model reduces a
+    nested batch, and the step logs are MEAN-reduced along a batch axis that scalars do not
+    have. For multi-worker runs the model is traced lazily inside the strategy scope and
+    each step reports its logs with a length-1 batch axis, so the all-reduce averages them
+    and every worker sees the same metrics (and takes the same EarlyStopping decisions).
+    """
+    if not isinstance(strategy, tf.distribute.MultiWorkerMirroredStrategy):
+        return model.fit(*args, **kwargs)
+
+    check_keras_version()
+    if not hasattr(model, "_distribute_strategy"):
+        raise RuntimeError(f"This Keras ({type(model).__module__}) has no Model._distribute_strategy; "
+                           f"src/distributed.fit() needs updating for it.")
+    model._distribute_strategy = None
+    if not getattr(model, "_multi_worker_steps", False):
+        model.train_step = _with_batch_axis(model.train_step)
+        model.test_step = _with_batch_axis(model.test_step)
+        model._multi_worker_steps = True
+    with strategy.scope():
+        return model.fit(*args, **kwargs)
+
+
+def free_ports(n):
+    socks = [socket.socket() for _ in range(n)]
+    for s in socks:
+        s.bind(("localhost", 0))
+    ports = [s.getsockname()[1] for s in socks]
+    for s in socks:
+        s.close()
+    return ports
+
+
+def launch_local(num_workers, script, script_args=(), threads_per_worker=None):
+    """
+    Runs `script` as a local multi-worker cluster: one process per worker, each with its
+    own TF_CONFIG (worker 0 is the chief). Returns the highest exit code.
+    """
+    cluster = {"worker": [f"localhost:{port}" for port in free_ports(num_workers)]}
+    procs = []
+    for index in range(num_workers):
+        env = dict(os.environ)
+        env["TF_CONFIG"] = json.dumps({"cluster": cluster, "task": {"type": "worker", "index": index}})
+        if threads_per_worker:
+            # Keep N workers on one host from oversubscribing the cores
+            env["TF_NUM_INTRAOP_THREADS"] = str(threads_per_worker)
+            env["TF_NUM_INTEROP_THREADS"] = "2"
+            env["OMP_NUM_THREADS"] = str(threads_per_worker)
+        print(f"🚀 Starting worker {index} on {cluster['worker'][index]}")
+        procs.append(subprocess.Popen([sys.executable, script, *script_args], env=env))
+    return max(p.wait() for p in procs)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Launch a local multi-worker training cluster (one process per worker, TF_CONFIG set for each).")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="Intra-op threads per worker (default: let TensorFlow use every core)")
+    parser.add_argument("--script", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "train_advanced.py"))
+    parser.add_argument("script_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    sys.exit(launch_local(args.workers, args.script, args.script_args, args.threads_per_worker))
+
+
+if __name__ == "__main__":
+    main()
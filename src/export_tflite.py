@@ -0,0 +1,84 @@
+import os
+import sys
+import argparse
+import tensorflow as tf
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+QUANTIZATION_MODES = ("dynamic", "float16", "int8")
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def tflite_path(mode):
+    return os.path.join(config.MODELS_DIR, f"efficientnet_{mode}.tflite")
+
+
+def representative_images(limit):
+    """Round-robins over the VAL_DIR class folders so calibration sees every class."""
+    if not os.path.exists(config.VAL_DIR):
+        raise FileNotFoundError(f"'{config.VAL_DIR}' not found. Run src/preprocess.py first.")
+
+    per_class = []
+    for class_name in sorted(os.listdir(config.VAL_DIR)):
+        class_dir = os.path.join(config.VAL_DIR, class_name)
+        if os.path.isdir(class_dir):
+            files = sorted(f for f in os.listdir(class_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+            per_class.append([os.path.join(class_dir, f) for f in files])
+
+    paths = []
+    for i in range(max((len(files) for files in per_class), default=0)):
+        paths.extend(files[i] for files in per_class if i < len(files))
+    return paths[:limit]
+
+
+def representative_dataset(limit):
+    def gen():
+        for path in representative_images(limit):
+            img = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+            img = tf.image.resize(tf.cast(img, tf.float32), config.IMG_SIZE)
+            yield [tf.expand_dims(img, 0)]
+    return gen
+
+
+def convert(model, mode, num_calibration=None):
+    """Converts a Keras model with dynamic-range, float16 or full-integer quantization."""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if mode == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == "int8":
+        # EfficientNet takes raw 0-255 pixels, so a uint8 input tensor loses nothing
+        converter.representative_dataset = representative_dataset(num_calibration or config.TFLITE_REPRESENTATIVE_IMAGES)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.uint8
+    elif mode != "dynamic":
+        raise ValueError(f"Unknown quantization mode '{mode}'. Choose from {QUANTIZATION_MODES}.")
+
+    return converter.convert()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the trained model to quantized TFLite engines.")
+    parser.add_argument("--modes", nargs="+", default=list(QUANTIZATION_MODES), choices=QUANTIZATION_MODES)
+    parser.add_argument("--calibration-images", type=int, default=config.TFLITE_REPRESENTATIVE_IMAGES)
+    args = parser.parse_args()
+
+    print(f"⚙️ Loading {config.MODEL_PATH}")
+    model = tf.keras.models.load_model(config.MODEL_PATH)
+
+    for mode in args.modes:
+        print(f"🔧 Converting ({mode})...")
+        tflite_model = convert(model, mode, args.calibration_images)
+        out_path = tflite_path(mode)
+        with open(out_path, 'wb') as f:
+            f.write(tflite_model)
+        print(f"   Saved {out_path} ({len(tflite_model) / 1e6:.1f} MB)")
+
+    print("✅ Export complete. Set MODEL_BACKEND = 'tflite' in config.py to serve it.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from src.data_pipeline import AUTOTUNE
+from src.model_builder import build_feature_extractor, build_feature_head, copy_head_weights
+
+# Cached features for a split live in config.FEATURES_DIR:
+#   <split>_features.npy  float16 [N * copies, 1280] pooled EfficientNet features
+#   <split>_labels.npy    int32   [N * copies]
+#   <split>_meta.json     fingerprint of the images / settings the cache was built from
+
+
+def dataset_fingerprint(folder, copies, seed):
+    """Changes whenever an image is added, removed or modified, or the extraction settings change."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([list(config.IMG_SIZE), copies, seed, folder.class_indices]).encode())
+    for path in folder.filepaths:
+        st = os.stat(path)
+        h.update(f"{path}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def extract_features(extractor, make_dataset, folder, name, copies=0, seed=None):
+    """
+    Runs the frozen backbone once per image (plus `copies` augmented passes) and stores
+    the pooled features as float16. Reuses the files on disk when nothing changed.
+    """
+    seed = config.SEED if seed is None else seed
+    os.makedirs(config.FEATURES_DIR, exist_ok=True)
+    feat_path = os.path.join(config.FEATURES_DIR, f"{name}_features.npy")
+    label_path = os.path.join(config.FEATURES_DIR, f"{name}_labels.npy")
+    meta_path = os.path.join(config.FEATURES_DIR, f"{name}_meta.json")
+
+    fingerprint = dataset_fingerprint(folder, copies, seed)
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r') as f:
+            if json.load(f).get("fingerprint") == fingerprint:
+                print(f"   Reusing cached {name} features ({feat_path})")
+                return np.load(feat_path, mmap_mode='r'), np.load(label_path)
+
+    passes = [False] + [True] * copies  # one clean pass, then augmented ones
+    total = folder.samples * len(passes)
+    feature_dim = extractor.output_shape[-1]
+    features = np.lib.format.open_memmap(feat_path, mode='w+', dtype=np.float16, shape=(total, feature_dim))
+    labels = np.empty(total, dtype=np.int32)
+
+    row = 0
+    for i, augmented in enumerate(passes):
+        print(f"   Extracting {name} features (pass {i + 1}/{len(passes)}{', augmented' if augmented else ''})...")
+        ds = make_dataset(augmented, seed + i)
+        for images, one_hot in ds:
+            batch_features = extractor(images, training=False).numpy()
+            n = len(batch_features)
+            features[row:row + n] = batch_features.astype(np.float16)
+            labels[row:row + n] = np.argmax(one_hot.numpy(), axis=1)
+            row += n
+    features.flush()
+    np.save(label_path, labels)
+
+    with open(meta_path, 'w') as f:
+        json.dump({"fingerprint": fingerprint, "rows": total, "feature_dim": feature_dim}, f)
+    return np.load(feat_path, mmap_mode='r'), labels
+
+
+def _feature_dataset(features, labels, num_classes, training, seed):
+    ds = tf.data.Dataset.from_tensor_slices((np.asarray(features), labels))
+    if training:
+        ds = ds.shuffle(len(labels), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(config.BATCH_SIZE)
+    ds = ds.map(lambda x, y: (tf.cast(x, tf.float32), tf.one_hot(y, num_classes)), num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+
+def train_head_on_cached_features(model, make_dataset, train_folder, val_folder, class_weight, epochs):
+    """
+    Phase 1 without recomputing the frozen backbone every epoch: extract pooled features
+    once, train the head on them, then copy the head weights back into `model`.
+    Returns the validation loss of the weights copied back.
+    """
+    extractor = build_feature_extractor(model)
+    train_x, train_y = extract_features(extractor, lambda aug, seed: make_dataset(config.TRAIN_DIR, aug, seed),
+                                        train_folder, "train", copies=config.FEATURE_AUG_COPIES)
+    val_x, val_y = extract_features(extractor, lambda aug, seed: make_dataset(config.VAL_DIR, aug, seed),
+                                    val_folder, "val", copies=0)
+
+    num_classes = train_folder.num_classes
+    head = build_feature_head(num_classes, feature_dim=train_x.shape[1])
+    head.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=config.LEARNING_RATE),
+        loss="categorical_crossentropy",
+        metrics=["accuracy"],
+        jit_compile=config.JIT_COMPILE
+    )
+    val_ds = _feature_dataset(val_x, val_y, num_classes, training=False, seed=config.SEED)
+    head.fit(
+        _feature_dataset(train_x, train_y, num_classes, training=True, seed=config.SEED),
+        epochs=epochs,
+        validation_data=val_ds,
+        class_weight=class_weight,
+        callbacks=[
+            EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True),
+            ReduceLROnPlateau(monitor='val_loss', factor=0.2, patience=3, min_lr=1e-6)
+        ]
+    )
+
+    copy_head_weights(head, model)
+    # The val_loss the full model has with these weights (same frozen backbone, unaugmented val set)
+    return float(head.evaluate(val_ds, verbose=0)[0])
@@ -0,0 +1,107 @@
+import io
+import os
+import numpy as np
+# TensorFlow is imported inside the tf.io decoders, so the PIL path works in processes
+# that never load TensorFlow (web workers in front of src/inference_server.py)
+
+
+def read_image_bytes(source):
+    """Accepts a file path, raw bytes or a file-like stream and returns the encoded bytes."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read()
+    if hasattr(source, 'read'):
+        return source.read()
+    raise TypeError(f"Unsupported image source: {type(source).__name__}")
+
+
+def decode_image(data):
+    """Decodes JPEG/PNG/BMP/GIF bytes straight to an RGB float32 HxWx3 array (no temp file)."""
+    import tensorflow as tf
+    img = tf.io.decode_image(data, channels=3, expand_animations=False)
+    return tf.cast(img, tf.float32).numpy()
+
+
+JPEG_MAGIC = b'\xff\xd8\xff'
+JPEG_SCALE_RATIOS = (8, 4, 2)  # libjpeg DCT scaling factors (1/8, 1/4, 1/2)
+
+
+def jpeg_scale_ratio(height, width, target_size):
+    """Largest DCT downscale that still decodes to at least `target_size` (h, w) pixels."""
+    for ratio in JPEG_SCALE_RATIOS:
+        if height // ratio >= target_size[0] and width // ratio >= target_size[1]:
+            return ratio
+    return 1
+
+
+def decode_image_resized(data, target_size):
+    """
+    Decodes straight to a `target_size` float32 HxWx3 array. JPEGs are decoded at reduced
+    resolution (DCT scaling, 1/2 .. 1/8) close to the target, so a 12 MP photo never
+    exists at full size in memory; every image is then resized exactly once.
+    """
+    import tensorflow as tf
+    if data[:3] == JPEG_MAGIC:
+        height, width, _ = tf.io.extract_jpeg_shape(data).numpy()  # Header only
+        ratio = jpeg_scale_ratio(height, width, target_size)
+        # ISLOW IDCT, like PIL (TF's default is the less accurate IFAST)
+        img = tf.io.decode_jpeg(data, channels=3, ratio=ratio, dct_method="INTEGER_ACCURATE")
+    else:
+        img = tf.io.decode_image(data, channels=3, expand_animations=False)
+    return tf.image.resize(img, target_size).numpy()
+
+
+def _bilinear_taps(in_size, out_size):
+    # tf.image.resize's bilinear sampling: half-pixel centers, no antialiasing
+    x = (np.arange(out_size, dtype=np.float32) + 0.5) * np.float32(in_size / out_size) - 0.5
+    floor = np.floor(x)
+    lower = np.maximum(floor, 0).astype(np.intp)
+    upper = np.minimum(np.ceil(x), in_size - 1).astype(np.intp)
+    return lower, upper, (x - floor).astype(np.float32)
+
+
+def resize_bilinear(img, target_size):
+    """tf.image.resize(img, target_size) (bilinear) in numpy, for processes without TensorFlow."""
+    img = np.asarray(img, dtype=np.float32)
+    top, bottom, y_lerp = _bilinear_taps(img.shape[0], target_size[0])
+    left, right, x_lerp = _bilinear_taps(img.shape[1], target_size[1])
+    x_lerp = x_lerp[None, :, None]
+    rows_top, rows_bottom = img[top], img[bottom]
+    upper = rows_top[:, left] + (rows_top[:, right] - rows_top[:, left]) * x_lerp
+    lower = rows_bottom[:, left] + (rows_bottom[:, right] - rows_bottom[:, left]) * x_lerp
+    return upper + (lower - upper) * y_lerp[:, None, None]
+
+
+def decode_image_pil(data, target_size):
+    """
+    decode_image_resized() without TensorFlow: PIL's draft mode is the same JPEG DCT
+    scaling (smallest 1/2 .. 1/8 scale still covering the target) and resize_bilinear()
+    the same resize, so both paths feed the model (near-)identical pixels.
+    """
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as img:
+        img.draft('RGB', (target_size[1], target_size[0]))
+        decoded = np.asarray(img.convert('RGB'))
+    return resize_bilinear(decoded, target_size)
+
+
+def make_thumbnail(data, max_side, quality=75):
+    """Small JPEG preview of an upload (large JPEGs are draft-decoded, never at full size)."""
+    from PIL import Image, ImageOps
+    with Image.open(io.BytesIO(data)) as img:
+        img.draft('RGB', (max_side, max_side))
+        img = ImageOps.exif_transpose(img).convert('RGB')  # Phone photos: apply the EXIF rotation
+        img.thumbnail((max_side, max_side))
+        buf = io.BytesIO()
+        img.save(buf, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def load_image(source, target_size=None):
+    """Decoded RGB float32 image; with `target_size` it is decoded small and resized to it."""
+    data = read_image_bytes(source)
+    if target_size is not None:
+        return decode_image_resized(data, target_size)
+    return decode_image(data)
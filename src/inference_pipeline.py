@@ -1,76 +1,363 @@
-import tensorflow as tf
 import numpy as np
-import json
 import os
 import sys
+import time
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # Connect to config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
 
-# --- FIXED IMPORT: Pointing to 'disease_info.py' ---
-from models.disease_info import plant_disease_info
+from src import metrics
+from src.batching import MicroBatcher
+from src.knowledge_base import knowledge_base, load_class_names
+from src.prediction_cache import PredictionCache, make_cache_key
+# TensorFlow (and the modules built on it) is imported lazily, so importing this
+# module - and therefore starting Flask or running a test - stays fast.
+
+DECODE_ERROR_MESSAGE = "Unsupported or corrupt image."
+
+def model_file_version(path):
+    """Short content hash of the model file, used to tag cache entries."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+class ModelEngine:
+    """
+    One loaded model version: its inference functions plus its own micro-batcher, so requests
+    already running on it finish on it while a newer version takes over.
+    """
+
+    def __init__(self, version, path, predict_batch, predict_image, inference_mode, model=None):
+        self.version = version
+        self.path = path
+        self.predict_batch = predict_batch
+        self.predict_image = predict_image
+        self.inference_mode = inference_mode
+        self.model = model
+        self.loaded_at = time.time()
+
+        # Coalesce concurrent requests into shared forward passes
+        self.batcher = None
+        if getattr(config, 'MICRO_BATCHING', False):
+            self.batcher = MicroBatcher(predict_batch,
+                                        max_batch_size=config.MAX_BATCH_SIZE,
+                                        max_wait_ms=config.MAX_BATCH_WAIT_MS,
+                                        on_batch=metrics.observe_batch)
+
+    def active_version(self):
+        """The version the next forward pass will run on (what cache lookups are keyed by)."""
+        return self.version
+
+    def predict_views(self, views):
+        """Predictions for one request's TTA views (shared forward pass when micro-batching)."""
+        if self.batcher is not None:
+            return self.batcher.predict(views)
+        return self.predict_batch(views)
+
+    def close(self):
+        # Drain: whatever is queued still gets its answer
+        if self.batcher is not None:
+            self.batcher.stop(drain=True)
 
 class DiseasePredictor:
-    def __init__(self):
-        print("⚙️ Loading Robust Model...")
-        self.model = tf.keras.models.load_model(config.MODEL_PATH)
-        
-        # --- FIXED SECTION START: Loading Class Labels ---
-        with open(config.CLASS_INDICES_PATH, 'r') as f:
-            raw_indices = json.load(f)
-            
-            # Auto-detect format:
-            # Check the first key. Is it a number like "0" or a word like "Tomato"?
-            first_key = list(raw_indices.keys())[0]
-            
-            if first_key.isdigit():
-                # Format is {"0": "Tomato"}. We just convert "0" -> 0.
-                self.labels = {int(k): v for k, v in raw_indices.items()}
-            else:
-                # Format is {"Tomato": 0}. We must SWAP keys and values.
-                self.labels = {v: k for k, v in raw_indices.items()}
+    def __init__(self, model_path=None):
+        self.tta_augmentations = config.TTA_PRESETS[getattr(config, 'TTA_MODE', 'full')]
+        self._load_tta()
+
+        # Warm pool of loaded versions (the active one included), oldest first
+        self._pool = OrderedDict()
+        self._swap_lock = threading.Lock()
+        self.swap_status = {"state": "idle", "version": None, "error": None}
+        self._engine = self._load_engine(model_path or self.default_model_path())
+        self._pool[self._engine.version] = self._engine
         
+        # Class labels ({index: name}, whichever format class_indices.json was written in)
+        self.labels = load_class_names()
         print(f"✅ Class Labels Loaded: {len(self.labels)} classes found.")
-        # --- FIXED SECTION END ---
-            
-        # --- NEW: Link directly to the imported Python dictionary ---
-        # No json.load() needed anymore!
-        self.knowledge_base = plant_disease_info
+
+        # Compiled, read-only response parts per class index (src/knowledge_base.py)
+        self.knowledge_base = knowledge_base
+
+        # Re-uploads and client retries skip the forward pass entirely
+        self.cache = None
+        if getattr(config, 'PREDICTION_CACHE', False):
+            self.cache = PredictionCache(max_entries=config.CACHE_MAX_ENTRIES,
+                                         ttl_seconds=config.CACHE_TTL_SECONDS,
+                                         disk_dir=config.CACHE_DIR,
+                                         disk_max_bytes=config.CACHE_DIR_MAX_BYTES,
+                                         sweep_every=config.CACHE_SWEEP_EVERY)
+
+    def default_model_path(self):
+        return config.MODEL_PATH
+
+    def _load_tta(self):
+        from src.model_runtime import make_tta_fn
+        self._tta = make_tta_fn(self.tta_augmentations)
+
+    def _load_engine(self, path):
+        """Loads the Keras model at `path` into a ModelEngine with fixed-signature inference functions."""
+        import tensorflow as tf
+        from src.model_runtime import make_predict_fn, make_image_predict_fn
+
+        print(f"⚙️ Loading Robust Model ({os.path.basename(path)})...")
+        model = tf.keras.models.load_model(path)
+        mode = getattr(config, 'INFERENCE_MODE', 'keras')
+        # Traced by warm_up() rather than by the first upload
+        return ModelEngine(version=model_file_version(path), path=path,
+                           predict_batch=make_predict_fn(model, mode),
+                           predict_image=make_image_predict_fn(model, mode, self.tta_augmentations),
+                           inference_mode=mode, model=model)
+
+    # The active version (one attribute read, so a request never mixes two versions)
+    @property
+    def model_version(self):
+        return self._engine.version
+
+    @property
+    def model(self):
+        return self._engine.model
+
+    @property
+    def inference_mode(self):
+        return self._engine.inference_mode
+
+    def warm_up(self, engine=None):
+        """Traces the inference functions with dummy inputs so the first real request is fast."""
+        from src.model_runtime import warm_up
+        engine = engine or self._engine
+        n_views = len(self.tta_augmentations)
+        batch_sizes = (n_views, config.MAX_BATCH_SIZE) if getattr(config, 'MICRO_BATCHING', False) else (n_views,)
+        warm_up(engine.predict_batch, batch_sizes=batch_sizes)
+        synthetic = np.random.default_rng(0).uniform(0, 255, (config.IMG_SIZE[0], config.IMG_SIZE[1], 3))
+        engine.predict_image(synthetic.astype(np.float32))
+
+    # ==========================================
+    # Hot-swap
+    # ==========================================
+    def load_version(self, path=None):
+        """
+        Loads the model at `path` (default: the configured model file) next to the active
+        one, warms it up, then swaps it in atomically. Requests keep being served by the
+        old version until the swap, and requests already on it finish there.
+        Returns the now active version.
+        """
+        path = path or self.default_model_path()
+        with self._swap_lock:
+            version = model_file_version(path)
+            if version in self._pool:
+                return self._activate(version)
+
+            self.swap_status = {"state": "loading", "version": version, "error": None}
+            try:
+                engine = self._load_engine(path)
+                self.swap_status["state"] = "warming"
+                self.warm_up(engine)
+            except Exception as e:
+                self.swap_status = {"state": "failed", "version": version, "error": repr(e)}
+                raise
+            self._pool[engine.version] = engine
+            return self._activate(engine.version)
+
+    def activate_version(self, version):
+        """Switches to a version still held in the warm pool (instant roll back / forward)."""
+        with self._swap_lock:
+            if version not in self._pool:
+                raise KeyError(f"Model version {version} is not loaded (pool: {list(self._pool)})")
+            return self._activate(version)
+
+    def _activate(self, version):
+        previous = self._engine
+        self._engine = self._pool[version]
+        self._pool.move_to_end(version)
+        self.swap_status = {"state": "idle", "version": version, "error": None}
+        if previous is not self._engine:
+            print(f"🔁 Model version {previous.version} -> {version}")
+
+        # Keep the most recent MODEL_POOL_SIZE versions warm for quick roll back
+        while len(self._pool) > max(1, config.MODEL_POOL_SIZE):
+            _, evicted = self._pool.popitem(last=False)
+            evicted.close()
+        return version
+
+    def load_version_in_background(self, path=None):
+        """load_version() on a daemon thread; progress is in swap_status."""
+        def _load():
+            try:
+                self.load_version(path)
+            except Exception as e:
+                print(f"❌ Model swap failed: {e!r}")
+
+        thread = threading.Thread(target=_load, name="model-swap", daemon=True)
+        thread.start()
+        return thread
+
+    def pool_info(self):
+        return {
+            "active": self._engine.version,
+            "pool": [{"version": e.version, "path": e.path, "loaded_at": e.loaded_at} for e in self._pool.values()],
+            "swap": dict(self.swap_status),
+        }
 
     def preprocess(self, img_array):
+        import tensorflow as tf
         # EfficientNet expects raw 0-255 inputs, but we standardize size
         img = tf.image.resize(img_array, config.IMG_SIZE)
         return tf.expand_dims(img, axis=0)
 
-    def predict_robust(self, img_path):
+    def predict_robust(self, source, locale=None):
         """
         Uses Test-Time Augmentation (TTA).
+        `source` can be a file path, raw image bytes or a file-like stream (e.g. a Flask upload).
+        `locale` picks the knowledge-base language (config.DEFAULT_LOCALE when not available).
         """
-        original_img = tf.keras.utils.load_img(img_path)
-        img_arr = tf.keras.utils.img_to_array(original_img)
-        
-        # 1. Create Batch of Augmented Images
-        batch = []
-        batch.append(tf.image.resize(img_arr, config.IMG_SIZE)) # Original
-        batch.append(tf.image.resize(tf.image.flip_left_right(img_arr), config.IMG_SIZE)) # Flipped
-        batch.append(tf.image.resize(tf.image.rot90(img_arr), config.IMG_SIZE)) # Rotated
-        batch.append(tf.image.resize(tf.image.adjust_brightness(img_arr, 1.2), config.IMG_SIZE)) # Bright
-        
-        batch = np.array(batch)
+        img_arr = self._decode(source)
+        engine = self._engine
+        return self.interpret(self._predict_probabilities(img_arr, engine), engine.version, locale)
+
+    def predict_probabilities(self, img_arr):
+        """Averaged TTA prediction vector for a decoded image (served from the cache when possible)."""
+        return self._predict_probabilities(img_arr, self._engine)
+
+    @staticmethod
+    def _decode(source):
+        from src.image_io import load_image
+        # FAST_DECODE: reduced-resolution JPEG decode, resized to the model input once
+        target_size = config.IMG_SIZE if getattr(config, 'FAST_DECODE', False) else None
+        with metrics.stage("decode"):
+            return load_image(source, target_size)
+
+    def _predict_probabilities(self, img_arr, engine):
+        version = engine.active_version() if self.cache is not None else None
+        key, cached = self._cache_get(img_arr, version)
+        if cached is not None:
+            return cached
 
-        # 2. Predict on all of them
-        predictions = self.model.predict(batch)
+        # 1 + 2. Build the TTA batch (config.TTA_MODE) in-graph and predict on all views.
+        # When micro-batching, the forward pass is shared with other requests
+        # ("inference" then includes the queue_wait); otherwise TTA and the model
+        # run as a single fused call.
+        if engine.batcher is not None:
+            with metrics.stage("tta"):
+                views = np.asarray(self._tta(img_arr))
+            with metrics.stage("inference"):
+                predictions = engine.predict_views(views)
+        else:
+            with metrics.stage("tta_inference"):
+                predictions = engine.predict_image(img_arr)
         
         # 3. Average the results (Consensus)
         avg_pred = np.mean(predictions, axis=0)
-        
+
+        if version is not None and engine.version != version:
+            # Swapped between the lookup and the forward pass: file it under the version that answered
+            key = self._cache_key(img_arr, engine.version)
+        self._cache_put(key, avg_pred)
+        return avg_pred
+
+    def predict_batch(self, sources, batch_size=None, workers=None, locale=None):
+        """
+        Streams predictions for many images, yielding (source, result) in input order.
+        Decoding runs in a thread pool one chunk ahead of the model, and each chunk
+        goes through the model as a single large batch of TTA views.
+        """
+        batch_size = batch_size or config.PREDICT_BATCH_SIZE
+        workers = workers or config.DECODE_WORKERS
+        sources = iter(sources)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = None
+            while True:
+                chunk = list(itertools.islice(sources, batch_size))
+                if not chunk:
+                    break
+                decoding = [pool.submit(self._decode, src) for src in chunk]
+                if pending is not None:
+                    yield from self._predict_chunk(*pending, locale)
+                pending = (chunk, decoding)
+            if pending is not None:
+                yield from self._predict_chunk(*pending, locale)
+
+    def _predict_chunk(self, chunk, decoding, locale=None):
+        engine = self._engine  # One version for the whole chunk
+        version = engine.active_version() if self.cache is not None else engine.version
+        probs = [None] * len(chunk)
+        versions = [version] * len(chunk)  # The version each prediction came from
+        errors = {}
+        to_run = []  # (position, image, cache key)
+
+        for i, future in enumerate(decoding):
+            try:
+                img_arr = future.result()
+            except Exception as e:
+                # The decoder's error stays in the server log; clients get a fixed message
+                name = chunk[i] if isinstance(chunk[i], str) else f"#{i} of the batch"
+                print(f"⚠️ Could not read image {name}: {e!r}")
+                errors[i] = {"status": "Error", "message": DECODE_ERROR_MESSAGE}
+                metrics.observe_outcome("Error")
+                continue
+            key, cached = self._cache_get(img_arr, version)
+            if cached is not None:
+                probs[i] = cached
+            else:
+                to_run.append((i, img_arr, key))
+
+        if to_run:
+            with metrics.stage("tta"):
+                views = np.concatenate([np.asarray(self._tta(img_arr)) for _, img_arr, _ in to_run])
+            metrics.observe_batch_images(len(views), "batch")
+            with metrics.stage("inference"):
+                predictions = engine.predict_batch(views)
+            n_views = len(self.tta_augmentations)
+            avg_preds = predictions.reshape(len(to_run), n_views, -1).mean(axis=1)
+            swapped = engine.version != version  # Server-side hot swap since the lookups
+            for (i, img_arr, key), avg_pred in zip(to_run, avg_preds):
+                probs[i] = avg_pred
+                versions[i] = engine.version
+                self._cache_put(self._cache_key(img_arr, engine.version) if swapped else key, avg_pred)
+
+        for i, src in enumerate(chunk):
+            yield src, errors[i] if i in errors else self.interpret(probs[i], versions[i], locale)
+
+    def _cache_key(self, img_arr, model_version):
+        if self.cache is None:
+            return None
+        return make_cache_key(img_arr, model_version, self.tta_augmentations)
+
+    def _cache_get(self, img_arr, model_version):
+        if self.cache is None:
+            return None, None
+        with metrics.stage("cache_lookup"):
+            key = self._cache_key(img_arr, model_version)
+            cached = self.cache.get(key)
+        metrics.observe_cache_lookup(cached is not None)
+        if cached is not None:
+            cached = np.asarray(cached, dtype=np.float32)
+        return key, cached
+
+    def _cache_put(self, key, avg_pred):
+        if key is not None:
+            self.cache.put(key, avg_pred.tolist())
+
+    def interpret(self, avg_pred, model_version=None, locale=None):
+        """Turns an averaged prediction vector into the result dict used by the web layer."""
+        with metrics.stage("knowledge_base"):
+            result = self._interpret(avg_pred, locale)
+        metrics.observe_outcome(result["status"])
+        result["model_version"] = model_version or self.model_version
+        return result
+
+    def _interpret(self, avg_pred, locale=None):
         # 4. Analysis
-        class_idx = np.argmax(avg_pred)
-        confidence = np.max(avg_pred)
-        
-        # The dictionary is now guaranteed to be {Int: Name}, so this works safely
-        class_key = self.labels.get(int(class_idx), "Unknown") 
+        class_idx = int(np.argmax(avg_pred))
+        confidence = float(avg_pred[class_idx])
         
         # 5. Guardrails
         if confidence < config.CONFIDENCE_THRESHOLD:
@@ -80,31 +367,126 @@ class DiseasePredictor:
                 "confidence": f"{confidence:.2f}"
             }
         
-        bg_class = getattr(config, 'BACKGROUND_CLASS', 'Background_Noise')
-        if class_key == bg_class:
-            return {
-                "status": "Invalid",
-                "message": "No leaf detected. Please upload a clear plant image.",
-                "confidence": f"{confidence:.2f}"
-            }
+        # 6. Fetch Knowledge: the pre-compiled response parts of this class (shared, read-only;
+        # BACKGROUND_CLASS compiles to the "Invalid" answer, unknown indices to a generic one)
+        entry = self.knowledge_base.entry(class_idx, locale)
 
-        # 6. Fetch Knowledge (Dynamic)
-        # We get the info matching the class_key (e.g. "Tomato_Early_blight")
-        # .get() returns an empty dict {} if the disease isn't found, preventing crashes
-        info = self.knowledge_base.get(class_key, {})
-        
-        # 7. Return the RICH structure required by result.html
-        return {
-            "status": "Success",
-            "prediction": info.get("name", class_key.replace("_", " ")),
-            "scientific_name": info.get("scientific_name", "N/A"),
-            "description": info.get("description", "No description available."),
-            "confidence": f"{confidence:.1%}",
-            "severity": info.get("severity", "Unknown"),
-            "symptoms": info.get("symptoms", []),
-            "treatment_plan": info.get("treatment_plan", []),
-            "prevention": info.get("prevention", [])
-        }
+        # 7. Return the RICH structure required by result.html (only the confidence is new)
+        if entry["status"] == "Invalid":
+            return {**entry, "confidence": f"{confidence:.2f}"}
+        return {**entry, "class_index": class_idx, "confidence": f"{confidence:.1%}"}
+
+# ==========================================
+# Lazy singleton
+# ==========================================
+_predictor = None
+_predictor_lock = threading.Lock()
+_status = {"loading": False, "model_loaded": False, "warmed": False,
+           "load_seconds": None, "warmup_seconds": None, "error": None}
+
+def create_predictor():
+    """
+    Builds a predictor for the configured backend (config.MODEL_BACKEND), or a client of the
+    shared inference server when config.INFERENCE_SERVER is set.
+    """
+    if getattr(config, 'INFERENCE_SERVER', None):
+        from src.inference_server import RemoteDiseasePredictor
+        return RemoteDiseasePredictor()
+
+    backend = getattr(config, 'MODEL_BACKEND', 'keras')
+    if backend == 'tflite':
+        # Threads come from TFLITE_NUM_THREADS; configuring TF's pools would import TensorFlow
+        from src.tflite_runtime import TFLiteDiseasePredictor
+        return TFLiteDiseasePredictor()
+
+    from src.model_runtime import configure_threads
+    configure_threads(getattr(config, 'TF_INTRA_OP_THREADS', None), getattr(config, 'TF_INTER_OP_THREADS', None))
+    if backend == 'keras':
+        return DiseasePredictor()
+    raise ValueError(f"Unknown MODEL_BACKEND '{backend}'. Use 'keras' or 'tflite'.")
+
+def get_predictor():
+    """Loads, warms up (once) and returns the shared DiseasePredictor. Thread-safe."""
+    global _predictor
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                _status["loading"] = True
+                try:
+                    start = time.perf_counter()
+                    instance = create_predictor()
+                    _status["model_loaded"] = True
+                    _status["load_seconds"] = round(time.perf_counter() - start, 2)
+
+                    start = time.perf_counter()
+                    instance.warm_up()
+                    _status["warmed"] = True
+                    _status["warmup_seconds"] = round(time.perf_counter() - start, 2)
+                    _predictor = instance
+                except Exception as e:
+                    _status["error"] = repr(e)
+                    raise
+                finally:
+                    _status["loading"] = False
+    return _predictor
+
+def warm_up_in_background():
+    """Starts loading + warm-up on a daemon thread; poll readiness() to see when it is done."""
+    def _load():
+        try:
+            get_predictor()
+        except Exception as e:
+            print(f"❌ Model warm-up failed: {e!r}")
+
+    thread = threading.Thread(target=_load, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def readiness():
+    """Startup state for health checks: ready once the model is loaded and warmed."""
+    state = dict(_status, ready=_predictor is not None)
+    if _predictor is not None:
+        state["model_version"] = _predictor.model_version
+    return state
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+def watch_model_file(interval=None):
+    """
+    Polls the model file on a daemon thread and hot-swaps each new version in
+    (every worker process picks up a rollout by itself, without a restart).
+    """
+    interval = interval or config.MODEL_WATCH_INTERVAL
+
+    def _watch():
+        instance = get_predictor()
+        path = instance.default_model_path()
+        checked = last = _file_stamp(path)
+        while True:
+            time.sleep(interval)
+            stamp = _file_stamp(path)
+            # Act once the file changed and then stopped changing (it may still be being copied)
+            if stamp is not None and stamp != checked and stamp == last:
+                checked = stamp
+                if model_file_version(path) != instance.model_version:
+                    try:
+                        instance.load_version(path)
+                    except Exception as e:
+                        print(f"❌ Model swap failed: {e!r}")
+            last = stamp
+
+    thread = threading.Thread(target=_watch, name="model-watcher", daemon=True)
+    thread.start()
+    return thread
+
+class _LazyPredictor:
+    """Drop-in for the old import-time singleton: the model loads on first attribute access."""
+    def __getattr__(self, name):
+        return getattr(get_predictor(), name)
 
-# Singleton instance
-predictor = DiseasePredictor()
\ No newline at end of file
+predictor = _LazyPredictor()
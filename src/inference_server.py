@@ -0,0 +1,362 @@
+import os
+import sys
+import time
+import queue
+import atexit
+import signal
+import argparse
+import threading
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Listener
+import numpy as np
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from src import metrics
+from src.image_io import decode_image_pil, read_image_bytes, resize_bilinear
+from src.inference_pipeline import DiseasePredictor, ModelEngine
+
+# Shared inference server: each server process owns one copy of the model and listens on
+# a Unix socket. A web worker writes the TTA views of a request into a shared-memory
+# segment it owns and sends only the segment name + count; the server predicts straight
+# from that memory (requests of all workers share micro-batched forward passes) and
+# writes the predictions back into the same segment.
+#
+#   python src/inference_server.py                 # config.INFERENCE_SERVER_PROCESSES processes
+#   INFERENCE_SERVER = "/tmp/leaf-inference.sock"  # in config.py, for the web workers
+
+# TTA views in numpy, identical to model_runtime.TTA_AUGMENTATIONS on an already resized image
+NUMPY_TTA = {
+    "original": lambda img: img,
+    "flip": lambda img: img[:, ::-1],
+    "rot90": np.rot90,
+    "bright": lambda img: img + 1.2,  # tf.image.adjust_brightness adds the delta to float images
+}
+
+
+def fit_to_input(img):
+    """An IMG_SIZE float32 image (decoded uploads already are; other arrays get resized like tf.image.resize)."""
+    if img.shape[:2] == tuple(config.IMG_SIZE):
+        return np.asarray(img, dtype=np.float32)
+    return resize_bilinear(img, config.IMG_SIZE)
+
+
+def server_address(index=0, socket=None):
+    return f"{socket or config.INFERENCE_SERVER}.{index}"
+
+
+def view_shape(n):
+    return (n, config.IMG_SIZE[0], config.IMG_SIZE[1], 3)
+
+
+# ==========================================
+# Server side
+# ==========================================
+def _attach(name):
+    segment = shared_memory.SharedMemory(name=name)
+    # The web worker created (and will unlink) the segment; don't let this process's
+    # resource tracker remove it on exit
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+class InferenceServer:
+    """Serves predictions from one predictor to any number of web-worker connections."""
+
+    def __init__(self, address, predictor):
+        self.address = address
+        self.predictor = predictor
+
+    def serve_forever(self):
+        if os.path.exists(self.address):
+            os.remove(self.address)  # Stale socket from a previous run
+        with Listener(self.address, family="AF_UNIX") as listener:
+            print(f"✅ Inference server listening on {self.address} (model {self.predictor.model_version})")
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._handle, args=(conn,), name="inference-conn", daemon=True).start()
+
+    def _handle(self, conn):
+        segment = None
+        try:
+            while True:
+                try:
+                    msg = conn.recv()
+                except EOFError:
+                    return
+                try:
+                    if msg["op"] == "predict":
+                        if segment is None or segment.name != msg["shm"]:
+                            if segment is not None:
+                                segment.close()
+                            segment = _attach(msg["shm"])
+                        conn.send(self._predict(segment, msg["n"]))
+                    else:
+                        conn.send(self._control(msg))
+                except Exception as e:
+                    conn.send({"ok": False, "error": repr(e), "type": type(e).__name__})
+        finally:
+            conn.close()
+            if segment is not None:
+                segment.close()
+
+    def _predict(self, segment, n):
+        engine = self.predictor._engine  # One version for the whole request
+        views = np.ndarray(view_shape(n), dtype=np.float32, buffer=segment.buf)
+        predictions = np.asarray(engine.predict_views(views), dtype=np.float32)
+        del views  # Release the buffer before writing into it
+        out = np.ndarray(predictions.shape, dtype=np.float32, buffer=segment.buf)
+        out[:] = predictions
+        del out
+        return {"ok": True, "shape": predictions.shape, "version": engine.version}
+
+    def _control(self, msg):
+        op = msg["op"]
+        if op == "version":  # Cheap: asked before every cache lookup
+            return {"ok": True, "active": self.predictor._engine.version}
+        if op == "info":
+            return {"ok": True, **self.predictor.pool_info(), "tta": list(self.predictor.tta_augmentations)}
+        if op == "load":
+            return {"ok": True, "active": self.predictor.load_version(msg.get("path"))}
+        if op == "activate":
+            return {"ok": True, "active": self.predictor.activate_version(msg["version"])}
+        raise ValueError(f"Unknown op '{op}'")
+
+
+def run_server(index, processes, socket):
+    """One server process: thread pools sized for its share of the cores, then load + warm + serve."""
+    address = server_address(index, socket)
+    config.INFERENCE_SERVER = None  # This process owns the model itself
+    if not config.TF_INTRA_OP_THREADS:
+        config.TF_INTRA_OP_THREADS = max(1, (os.cpu_count() or 1) // processes)
+    from src.inference_pipeline import get_predictor, watch_model_file
+    predictor = get_predictor()
+    if config.MODEL_WATCH_INTERVAL:
+        watch_model_file()
+    InferenceServer(address, predictor).serve_forever()
+
+
+# ==========================================
+# Web-worker side
+# ==========================================
+class _Channel:
+    """One connection plus the shared-memory segment its requests are written into."""
+
+    def __init__(self, address, nbytes):
+        self.conn = Client(address, family="AF_UNIX")
+        self.segment = shared_memory.SharedMemory(create=True, size=nbytes)
+
+    def reserve(self, nbytes):
+        if self.segment.size < nbytes:
+            self.segment.close()
+            self.segment.unlink()
+            self.segment = shared_memory.SharedMemory(create=True, size=nbytes)
+        return self.segment
+
+    def close(self):
+        self.conn.close()
+        self.segment.close()
+        self.segment.unlink()
+
+
+class InferenceClient:
+    """
+    Thread-safe client. Channels are pooled (not per thread), so a server that starts a
+    thread per request still reuses a handful of connections and segments.
+    """
+
+    def __init__(self, address, connect_timeout=None):
+        self.address = address
+        self.connect_timeout = connect_timeout
+        self._idle = queue.LifoQueue()
+        self._initial_bytes = int(np.prod(view_shape(len(config.TTA_PRESETS["full"])))) * 4
+        atexit.register(self.close)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        deadline = time.monotonic() + (self.connect_timeout or 0)
+        while True:
+            try:
+                return _Channel(self.address, self._initial_bytes)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"Inference server not reachable at {self.address}")
+                time.sleep(0.5)
+
+    def _call(self, fill, msg, nbytes=0):
+        """Sends `msg` on a pooled channel (after `fill(segment)` wrote the tensor); one retry on a new connection."""
+        for attempt in (0, 1):
+            channel = self._acquire()
+            try:
+                segment = channel.reserve(nbytes) if nbytes else channel.segment
+                if fill is not None:
+                    fill(segment)
+                channel.conn.send(dict(msg, shm=segment.name))
+                reply = channel.conn.recv()
+            except (EOFError, OSError):
+                channel.close()  # Server restarted: reconnect once
+                if attempt:
+                    raise
+                continue
+            if not reply.get("ok"):
+                self._idle.put(channel)
+                error = KeyError if reply.get("type") == "KeyError" else RuntimeError
+                raise error(reply.get("error"))
+            if "shape" in reply:
+                reply["predictions"] = np.array(np.ndarray(reply["shape"], dtype=np.float32, buffer=segment.buf))
+            self._idle.put(channel)
+            return reply
+
+    def close(self):
+        """Closes idle channels and unlinks their segments."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def call(self, op, **kwargs):
+        return self._call(None, dict(kwargs, op=op))
+
+    def predict_views(self, views):
+        """[n, H, W, 3] views -> ([n, classes] predictions, version that produced them)."""
+        views = np.asarray(views, dtype=np.float32)
+
+        def fill(segment):
+            np.ndarray(views.shape, dtype=np.float32, buffer=segment.buf)[:] = views
+
+        reply = self._call(fill, {"op": "predict", "n": len(views)}, views.nbytes)
+        return reply["predictions"], reply["version"]
+
+    def predict_image(self, img, augmentations):
+        """TTA views of one IMG_SIZE image written straight into shared memory (no intermediate batch)."""
+        shape = view_shape(len(augmentations))
+        img = fit_to_input(img)
+
+        def fill(segment):
+            views = np.ndarray(shape, dtype=np.float32, buffer=segment.buf)
+            for i, name in enumerate(augmentations):
+                views[i] = NUMPY_TTA[name](img)
+
+        reply = self._call(fill, {"op": "predict", "n": shape[0]}, int(np.prod(shape)) * 4)
+        return reply["predictions"], reply["version"]
+
+
+class RemoteEngine(ModelEngine):
+    """ModelEngine whose forward passes run in the inference server (which does the micro-batching)."""
+
+    def __init__(self, client, info, augmentations):
+        self.client = client
+        self.path = next((e["path"] for e in info["pool"] if e["version"] == info["active"]), None)
+        self.inference_mode = "remote"
+        self.model = None
+        self.batcher = None
+        self.loaded_at = time.time()
+        self.augmentations = augmentations
+        self._version = info["active"]
+        self._local = threading.local()
+
+    @property
+    def version(self):
+        # The version that answered this thread's last request (the server may hot-swap)
+        return getattr(self._local, "version", self._version)
+
+    def active_version(self):
+        # Asked from the server: a swap there is only seen here through a round trip
+        version = self.client.call("version")["active"]
+        self._seen(version)
+        return version
+
+    def _seen(self, version):
+        self._local.version = self._version = version
+
+    def predict_batch(self, views):
+        predictions, version = self.client.predict_views(views)
+        self._seen(version)
+        return predictions
+
+    def predict_image(self, img):
+        predictions, version = self.client.predict_image(img, self.augmentations)
+        self._seen(version)
+        return predictions
+
+    def close(self):
+        pass
+
+
+class RemoteDiseasePredictor(DiseasePredictor):
+    """
+    Same predict_robust / predict_batch contract, without a model (or TensorFlow) in this
+    process: uploads are decoded with PIL, TTA views built in numpy, and the forward pass
+    runs in the shared inference server. Hot-swap calls are forwarded to the server.
+    """
+
+    def __init__(self, address=None):
+        address = address or server_address(os.getpid() % max(1, config.INFERENCE_SERVER_PROCESSES))
+        self.client = InferenceClient(address, config.INFERENCE_SERVER_CONNECT_TIMEOUT)
+        super().__init__()
+
+    def _load_tta(self):
+        self._tta = self._numpy_tta
+
+    def _numpy_tta(self, img):
+        img = fit_to_input(img)
+        return np.stack([NUMPY_TTA[name](img) for name in self.tta_augmentations])
+
+    @staticmethod
+    def _decode(source):
+        with metrics.stage("decode"):
+            return decode_image_pil(read_image_bytes(source), config.IMG_SIZE)
+
+    def _load_engine(self, path):
+        info = self.client.call("info")
+        if info["tta"] != list(self.tta_augmentations):
+            print(f"⚠️ TTA_MODE differs from the inference server's ({info['tta']}); using this worker's.")
+        print(f"🔌 Using the inference server at {self.client.address} (model {info['active']})")
+        return RemoteEngine(self.client, info, self.tta_augmentations)
+
+    def warm_up(self, engine=None):
+        # The server is warm already; this checks the round trip
+        engine = engine or self._engine
+        engine.predict_image(np.zeros((config.IMG_SIZE[0], config.IMG_SIZE[1], 3), dtype=np.float32))
+
+    def load_version(self, path=None):
+        return self.client.call("load", path=path)["active"]
+
+    def activate_version(self, version):
+        return self.client.call("activate", version=version)["active"]
+
+    def pool_info(self):
+        info = self.client.call("info")
+        return {key: info[key] for key in ("active", "pool", "swap")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared inference server: the model lives here, web workers connect over Unix sockets.")
+    parser.add_argument("--processes", type=int, default=config.INFERENCE_SERVER_PROCESSES)
+    parser.add_argument("--socket", default=config.INFERENCE_SERVER, help="Socket path prefix (default: config.INFERENCE_SERVER)")
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("Set config.INFERENCE_SERVER (or --socket) to the socket path the web workers use.")
+
+    if args.processes == 1:
+        run_server(0, 1, args.socket)
+        return
+    ctx = multiprocessing.get_context("spawn")  # Fresh interpreters: no TensorFlow state shared by fork
+    procs = [ctx.Process(target=run_server, args=(i, args.processes, args.socket), name=f"inference-{i}", daemon=True)
+             for i in range(args.processes)]
+    # A stopped launcher takes its server processes with it (daemon children are terminated on exit)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import runpy
+import hashlib
+import argparse
+import tempfile
+import threading
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# The knowledge base is compiled once (after training, or by running this script) from
+# models/disease_info.py, the class map and optional translations into one file per locale:
+#
+#   config.KNOWLEDGE_DIR/<locale>.json
+#     {"fingerprint": ..., "locale": "en", "classes": [response parts of class 0, 1, ...]}
+#
+# config.TRANSLATIONS_DIR/<locale>.json holds per-class overrides in the disease_info.py
+# format ({"Tomato_Early_blight": {"name": ..., "symptoms": [...]}}); anything not translated
+# falls back to the default locale. A serving process loads only the locales it is asked for.
+
+DISEASE_INFO_SOURCE = os.path.join(config.MODELS_DIR, 'disease_info.py')
+
+
+class FrozenDict(dict):
+    """A dict that refuses changes, so compiled entries can be shared by every response."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Knowledge base entries are read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def load_class_names(path=None):
+    """{class index: class name} from the class map (either {"0": name} or {name: 0})."""
+    with open(path or config.CLASS_INDICES_PATH, 'r') as f:
+        raw_indices = json.load(f)
+    if next(iter(raw_indices)).isdigit():
+        return {int(k): v for k, v in raw_indices.items()}
+    return {v: k for k, v in raw_indices.items()}
+
+
+def translation_path(locale):
+    return os.path.join(config.TRANSLATIONS_DIR, f"{locale}.json")
+
+
+def compiled_path(locale):
+    return os.path.join(config.KNOWLEDGE_DIR, f"{locale}.json")
+
+
+def available_locales():
+    locales = [config.DEFAULT_LOCALE]
+    if os.path.isdir(config.TRANSLATIONS_DIR):
+        locales += sorted(f[:-5] for f in os.listdir(config.TRANSLATIONS_DIR)
+                          if f.endswith(".json") and f[:-5] != config.DEFAULT_LOCALE)
+    return locales
+
+
+def source_fingerprint(locale):
+    """Changes whenever the class map, disease_info.py or the locale's translations change."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{locale}|{config.BACKGROUND_CLASS}".encode())
+    paths = [config.CLASS_INDICES_PATH, DISEASE_INFO_SOURCE]
+    if locale != config.DEFAULT_LOCALE:
+        paths.append(translation_path(locale))
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+def compile_entry(class_key, info, background):
+    """The static part of a prediction response for one class (what _interpret used to build per request)."""
+    if background:
+        return {"status": "Invalid", "message": "No leaf detected. Please upload a clear plant image."}
+    return {
+        "status": "Success",
+        "prediction": info.get("name", class_key.replace("_", " ")),
+        "scientific_name": info.get("scientific_name", "N/A"),
+        "description": info.get("description", "No description available."),
+        "severity": info.get("severity", "Unknown"),
+        "symptoms": info.get("symptoms", []),
+        "treatment_plan": info.get("treatment_plan", []),
+        "prevention": info.get("prevention", []),
+    }
+
+
+def compile_locale(locale=None):
+    """Builds config.KNOWLEDGE_DIR/<locale>.json. Returns its path."""
+    locale = locale or config.DEFAULT_LOCALE
+    names = load_class_names()
+    info = runpy.run_path(DISEASE_INFO_SOURCE)["plant_disease_info"]  # Build time only
+    overrides = {}
+    if locale != config.DEFAULT_LOCALE:
+        with open(translation_path(locale), 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+
+    classes = []
+    for idx in range(max(names) + 1):
+        key = names.get(idx, "Unknown")
+        merged = {**info.get(key, {}), **overrides.get(key, {})}
+        classes.append(compile_entry(key, merged, background=(key == config.BACKGROUND_CLASS)))
+
+    os.makedirs(config.KNOWLEDGE_DIR, exist_ok=True)
+    path = compiled_path(locale)
+    # Own temp file per compiler, then rename: workers starting together may all recompile
+    fd, tmp = tempfile.mkstemp(dir=config.KNOWLEDGE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"fingerprint": source_fingerprint(locale), "locale": locale, "classes": classes},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return path
+
+
+def compile_all():
+    return [compile_locale(locale) for locale in available_locales()]
+
+
+class KnowledgeBase:
+    """
+    Read-only, per-class-index response parts, one locale at a time. A locale is loaded on
+    first use (and recompiled first if its sources changed since it was compiled).
+    """
+
+    UNKNOWN = freeze(compile_entry("Unknown", {}, background=False))
+
+    def __init__(self):
+        self._locales = {}
+        self._fingerprints = {}
+        self._available = None
+        self._lock = threading.Lock()
+
+    def locales(self):
+        if self._available is None:
+            self._available = available_locales()
+        return self._available
+
+    def resolve(self, locale=None):
+        """The locale actually served for a requested one."""
+        return locale if locale in self.locales() else config.DEFAULT_LOCALE
+
+    def entries(self, locale=None):
+        locale = self.resolve(locale)
+        entries = self._locales.get(locale)
+        if entries is None:
+            with self._lock:
+                entries = self._locales.get(locale)
+                if entries is None:
+                    entries, self._fingerprints[locale] = self._load(locale)
+                    self._locales[locale] = entries
+        return entries
+
+    def fingerprint(self, locale=None):
+        """Source fingerprint of the loaded entries of a locale (changes with their content)."""
+        self.entries(locale)
+        return self._fingerprints[self.resolve(locale)]
+
+    def entry(self, class_idx, locale=None):
+        entries = self.entries(locale)
+        return entries[class_idx] if 0 <= class_idx < len(entries) else self.UNKNOWN
+
+    @staticmethod
+    def _load(locale):
+        path = compiled_path(locale)
+        compiled = None
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                compiled = json.load(f)
+        if compiled is None or compiled.get("fingerprint") != source_fingerprint(locale):
+            print(f"📚 Compiling the '{locale}' knowledge base...")
+            with open(compile_locale(locale), 'r', encoding='utf-8') as f:
+                compiled = json.load(f)
+        return tuple(freeze(entry) for entry in compiled["classes"]), compiled["fingerprint"]
+
+
+# Shared by every predictor in the process
+knowledge_base = KnowledgeBase()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile models/disease_info.py (+ translations) into the indexed knowledge base.")
+    parser.add_argument("--locale", help="Compile one locale only (default: all available)")
+    args = parser.parse_args()
+    paths = [compile_locale(args.locale)] if args.locale else compile_all()
+    for path in paths:
+        print(f"✅ {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import os
+import sys
+import time
+import bisect
+import threading
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# In-process serving metrics, exposed in the Prometheus text format on /metrics.
+# Every gunicorn / uvicorn worker keeps its own numbers (scrape each worker, or sum them).
+# config.METRICS_ENABLED = False turns every call below into a single attribute check.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def enabled():
+    return config.METRICS_ENABLED
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, value, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram (le = upper bound), like prometheus_client's."""
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self._series = {}  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for labels, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total!r}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+# ==========================================
+# The serving metrics
+# ==========================================
+STAGE_SECONDS = Histogram(
+    "leaf_stage_seconds",
+    "Time per pipeline stage (upload, decode, tta, queue_wait, inference, knowledge_base, render).",
+    LATENCY_BUCKETS, ("stage",))
+REQUEST_SECONDS = Histogram(
+    "leaf_request_seconds", "End-to-end request time per endpoint.", LATENCY_BUCKETS, ("endpoint",))
+RESPONSES = Counter("leaf_http_responses_total", "HTTP responses per endpoint and status code.",
+                    ("endpoint", "code"))
+BATCH_IMAGES = Histogram(
+    "leaf_batch_images", "Images per model forward pass (micro-batcher or API batch).", BATCH_BUCKETS, ("source",))
+BATCH_REQUESTS = Histogram(
+    "leaf_batch_requests", "Requests coalesced into one micro-batched forward pass.", BATCH_BUCKETS)
+QUEUE_DEPTH = Gauge("leaf_batcher_queue_depth", "Requests waiting in the micro-batcher queue.")
+IN_FLIGHT = Gauge("leaf_inference_in_flight", "Inference requests running or queued in the async server.")
+REJECTED = Counter("leaf_requests_rejected_total", "Requests refused by the async server before the app.",
+                   ("reason",))
+OUTCOMES = Counter("leaf_predictions_total", "Prediction outcomes (Success / Unsure / Invalid / Error).",
+                   ("status",))
+CACHE_LOOKUPS = Counter("leaf_prediction_cache_lookups_total", "Prediction cache lookups (hit / miss).",
+                        ("result",))
+UPLOAD_BYTES_STORED = Gauge("leaf_upload_bytes_stored", "Bytes in the upload store, as of the last compaction pass.",
+                            ("kind",))
+UPLOAD_BYTES_WRITTEN = Counter("leaf_upload_bytes_written_total", "Bytes written to the upload store.", ("kind",))
+UPLOAD_BYTES_RECLAIMED = Counter("leaf_upload_bytes_reclaimed_total",
+                                 "Bytes freed in the upload store (age, quota, compaction).", ("reason",))
+
+REGISTRY = [STAGE_SECONDS, REQUEST_SECONDS, RESPONSES, BATCH_IMAGES, BATCH_REQUESTS,
+            QUEUE_DEPTH, IN_FLIGHT, REJECTED, OUTCOMES, CACHE_LOOKUPS,
+            UPLOAD_BYTES_STORED, UPLOAD_BYTES_WRITTEN, UPLOAD_BYTES_RECLAIMED]
+
+
+class _StageTimer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, self.stage)
+        return False
+
+
+class _NoTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+def stage(name):
+    """`with stage("decode"): ...` records the block's duration (no-op when metrics are off)."""
+    return _StageTimer(name) if config.METRICS_ENABLED else _NO_TIMER
+
+
+def observe_request(endpoint, code, seconds):
+    if config.METRICS_ENABLED:
+        REQUEST_SECONDS.observe(seconds, endpoint)
+        RESPONSES.inc(endpoint, code)
+
+
+def observe_batch(images, requests, queue_depth, waits):
+    """Called by the micro-batcher for every forward pass it runs."""
+    if config.METRICS_ENABLED:
+        BATCH_IMAGES.observe(images, "micro_batcher")
+        BATCH_REQUESTS.observe(requests)
+        QUEUE_DEPTH.set(queue_depth)
+        for wait in waits:
+            STAGE_SECONDS.observe(wait, "queue_wait")
+
+
+def observe_batch_images(images, source):
+    if config.METRICS_ENABLED:
+        BATCH_IMAGES.observe(images, source)
+
+
+def observe_outcome(status):
+    if config.METRICS_ENABLED:
+        OUTCOMES.inc(status)
+
+
+def set_in_flight(count):
+    if config.METRICS_ENABLED:
+        IN_FLIGHT.set(count)
+
+
+def observe_rejected(reason):
+    if config.METRICS_ENABLED:
+        REJECTED.inc(reason)
+
+
+def observe_cache_lookup(hit):
+    if config.METRICS_ENABLED:
+        CACHE_LOOKUPS.inc("hit" if hit else "miss")
+
+
+def observe_upload_written(kind, nbytes):
+    if config.METRICS_ENABLED:
+        UPLOAD_BYTES_WRITTEN.inc(kind, amount=nbytes)
+
+
+def observe_upload_reclaimed(reason, nbytes):
+    if config.METRICS_ENABLED:
+        UPLOAD_BYTES_RECLAIMED.inc(reason, amount=nbytes)
+
+
+def set_upload_stored(kind, nbytes):
+    if config.METRICS_ENABLED:
+        UPLOAD_BYTES_STORED.set(nbytes, kind)
+
+
+def render(extra=()):
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in list(REGISTRY) + list(extra):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -1,14 +1,29 @@
 import tensorflow as tf
 from tensorflow.keras import layers, models, applications
 
-def build_model(num_classes, img_size=(224, 224), fine_tune=False):
+# Head layers are named so they can be found again (feature-cache training, fine-tuning)
+HEAD_PREFIX = "head_"
+FEATURE_LAYER = "head_pool"
+
+def build_head_layers(num_classes):
+    # The Classifier Head (Custom for your leaves)
+    return [
+        layers.BatchNormalization(name="head_bn"),               # Stabilizes training
+        layers.Dropout(0.3, name="head_dropout_1"),              # Prevents overfitting
+        layers.Dense(256, activation='relu', name="head_dense"), # Extra dense layer for better feature mapping
+        layers.Dropout(0.2, name="head_dropout_2"),
+        # float32 softmax even under a mixed_float16 / mixed_bfloat16 policy (numerically stable)
+        layers.Dense(num_classes, activation="softmax", dtype="float32", name="head_output"),
+    ]
+
+def build_model(num_classes, img_size=(224, 224), fine_tune=False, weights="imagenet"):
     inputs = layers.Input(shape=(img_size[0], img_size[1], 3))
 
     # 1. The Pre-trained Brain (Transfer Learning)
     # EfficientNet includes internal rescaling, so no need for x / 255.0
     base_model = applications.EfficientNetB0(
-        include_top=False, 
-        weights="imagenet", 
+        include_top=False,
+        weights=weights,  # None = random init (benchmarks / offline tests)
         input_tensor=inputs
     )
 
@@ -22,14 +37,33 @@ def build_model(num_classes, img_size=(224, 224), fine_tune=False):
         base_model.trainable = False
 
     # 3. The Classifier Head (Custom for your leaves)
-    x = layers.GlobalAveragePooling2D()(base_model.output)
-    x = layers.BatchNormalization()(x)  # Stabilizes training
-    x = layers.Dropout(0.3)(x)          # Prevents overfitting
-    x = layers.Dense(256, activation='relu')(x) # Extra dense layer for better feature mapping
-    x = layers.Dropout(0.2)(x)
-    
-    outputs = layers.Dense(num_classes, activation="softmax")(x)
+    x = layers.GlobalAveragePooling2D(name=FEATURE_LAYER)(base_model.output)
+    for layer in build_head_layers(num_classes):
+        x = layer(x)
+    outputs = x
 
     model = models.Model(inputs, outputs)
-    
-    return model
\ No newline at end of file
+
+    return model
+
+def build_feature_head(num_classes, feature_dim=1280):
+    """The same head as build_model, taking pooled backbone features as input."""
+    inputs = layers.Input(shape=(feature_dim,))
+    x = inputs
+    for layer in build_head_layers(num_classes):
+        x = layer(x)
+    return models.Model(inputs, x)
+
+def build_feature_extractor(model):
+    """Image -> pooled backbone features, sharing the weights of `model`."""
+    return models.Model(model.input, model.get_layer(FEATURE_LAYER).output)
+
+def backbone_layers(model):
+    """The EfficientNet layers of a build_model() model (everything but the input and the head)."""
+    return [l for l in model.layers[1:] if not l.name.startswith(HEAD_PREFIX)]
+
+def copy_head_weights(source, target):
+    """Copies trained head weights between models built with build_head_layers()."""
+    for layer in source.layers:
+        if layer.name.startswith(HEAD_PREFIX) and layer.weights:
+            target.get_layer(layer.name).set_weights(layer.get_weights())
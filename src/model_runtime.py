@@ -0,0 +1,114 @@
+import os
+import sys
+import numpy as np
+import tensorflow as tf
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+INFERENCE_MODES = ("keras", "direct", "compiled")
+
+# Test-Time Augmentation views. All of them commute with resizing, so the image is
+# resized once and every view is derived from the small 224x224 tensor.
+TTA_AUGMENTATIONS = {
+    "original": lambda img: img,
+    "flip": tf.image.flip_left_right,
+    "rot90": tf.image.rot90,
+    "bright": lambda img: tf.image.adjust_brightness(img, 1.2),
+}
+
+
+def configure_threads(intra_op=None, inter_op=None):
+    """
+    Caps TensorFlow's thread pools for this process (None = TensorFlow's default: every core).
+    Only possible before TensorFlow runs its first op; later calls leave the pools unchanged.
+    """
+    try:
+        if intra_op:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        if inter_op:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError:
+        print("ℹ️  TensorFlow is already initialized; thread pool sizes unchanged.")
+
+
+def make_predict_fn(model, mode="compiled", img_size=None):
+    """
+    Wraps a Keras model into a plain `batch -> np.ndarray` callable.
+
+    keras    : model.predict() (data adapter + progress bar on every call)
+    direct   : model(batch, training=False), no per-call Keras overhead
+    compiled : traced tf.function with a fixed input signature
+    """
+    img_size = img_size or config.IMG_SIZE
+
+    if mode == "keras":
+        return lambda batch: model.predict(batch, verbose=0)
+
+    if mode == "direct":
+        return lambda batch: model(batch, training=False).numpy()
+
+    if mode == "compiled":
+        # Batch dim stays dynamic so micro-batches of any size reuse one trace
+        signature = [tf.TensorSpec([None, img_size[0], img_size[1], 3], tf.float32)]
+
+        @tf.function(input_signature=signature)
+        def serve(batch):
+            return model(batch, training=False)
+
+        return lambda batch: serve(tf.convert_to_tensor(batch, dtype=tf.float32)).numpy()
+
+    raise ValueError(f"Unknown inference mode '{mode}'. Choose from {INFERENCE_MODES}.")
+
+
+def warm_up(predict_fn, batch_sizes=(4,), img_size=None):
+    """Runs dummy batches so tracing and kernel selection happen before the first real request."""
+    img_size = img_size or config.IMG_SIZE
+    for size in batch_sizes:
+        predict_fn(np.zeros((size, img_size[0], img_size[1], 3), dtype=np.float32))
+
+
+def tta_views(image, augmentations, img_size=None):
+    """Builds the [n_views, H, W, 3] TTA batch from a single HxWx3 image, entirely in-graph."""
+    img_size = img_size or config.IMG_SIZE
+    img = tf.image.resize(image, img_size)
+    return tf.stack([TTA_AUGMENTATIONS[name](img) for name in augmentations])
+
+
+def _check_augmentations(augmentations):
+    unknown = [a for a in augmentations if a not in TTA_AUGMENTATIONS]
+    if unknown or not augmentations:
+        raise ValueError(f"Invalid TTA augmentations {list(augmentations)}. Choose from {list(TTA_AUGMENTATIONS)}.")
+
+
+def make_tta_fn(augmentations, img_size=None):
+    """Traced `image -> TTA batch` function (used when the forward pass is shared by the micro-batcher)."""
+    _check_augmentations(augmentations)
+    img_size = img_size or config.IMG_SIZE
+
+    @tf.function(input_signature=[tf.TensorSpec([None, None, 3], tf.float32)])
+    def tta(image):
+        return tta_views(image, augmentations, img_size)
+
+    return tta
+
+
+def make_image_predict_fn(model, mode="compiled", augmentations=("original",), img_size=None):
+    """
+    Returns an `image -> per-view predictions` callable.
+    In compiled mode the TTA stage and the model run as one fused graph.
+    """
+    _check_augmentations(augmentations)
+    img_size = img_size or config.IMG_SIZE
+
+    if mode == "compiled":
+        @tf.function(input_signature=[tf.TensorSpec([None, None, 3], tf.float32)])
+        def serve(image):
+            return model(tta_views(image, augmentations, img_size), training=False)
+
+        return lambda image: serve(tf.convert_to_tensor(image, dtype=tf.float32)).numpy()
+
+    tta = make_tta_fn(augmentations, img_size)
+    predict_fn = make_predict_fn(model, mode, img_size)
+    return lambda image: predict_fn(tta(tf.convert_to_tensor(image, dtype=tf.float32)))
@@ -0,0 +1,134 @@
+import os
+import sys
+import io
+import csv
+import json
+import time
+import argparse
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+CSV_FIELDS = ["path", "status", "prediction", "confidence", "severity", "message"]
+
+
+def iter_directory(root):
+    """Yields image paths under `root` in a stable (sorted) order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fname in sorted(filenames):
+            if fname.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(dirpath, fname)
+
+
+def iter_manifest(manifest_path):
+    """Yields one image path per non-empty line (relative paths resolve against the manifest's folder)."""
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, 'r') as f:
+        for line in f:
+            path = line.strip()
+            if path and not path.startswith('#'):
+                yield path if os.path.isabs(path) else os.path.join(base, path)
+
+
+def completed_paths(output_path):
+    """Paths already written by a previous (possibly crashed) run; the output file is the checkpoint."""
+    if not os.path.exists(output_path):
+        return set()
+    done = set()
+    with open(output_path, 'r', newline='') as f:
+        if output_path.endswith('.csv'):
+            # A last row without its newline is torn (ResultWriter cuts it off): it still needs predicting
+            text = f.read()
+            complete = text[:text.rfind("\n") + 1]
+            done.update(row["path"] for row in csv.DictReader(io.StringIO(complete, newline='')))
+        else:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["path"])
+                except (ValueError, KeyError):
+                    continue  # Torn last line from a crash; it will be re-predicted
+    return done
+
+
+def drop_torn_tail(output_path):
+    """Cuts a half-written last line left behind by a crash, so appended rows start clean."""
+    with open(output_path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+class ResultWriter:
+    """Appends results incrementally as JSONL or CSV (chosen by file extension)."""
+
+    def __init__(self, output_path, append):
+        self.is_csv = output_path.endswith('.csv')
+        if append and os.path.exists(output_path):
+            drop_torn_tail(output_path)
+        write_header = not (append and os.path.exists(output_path) and os.path.getsize(output_path) > 0)
+        self.f = open(output_path, 'a' if append else 'w', newline='')
+        if self.is_csv:
+            self.writer = csv.DictWriter(self.f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            if write_header:
+                self.writer.writeheader()
+
+    def write(self, path, result):
+        row = {"path": path, **result}
+        if self.is_csv:
+            self.writer.writerow(row)
+        else:
+            self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self):
+        self.f.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict diseases for a whole directory or manifest of leaf images.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="Directory of images (searched recursively)")
+    source.add_argument("--manifest", help="Text file with one image path per line")
+    parser.add_argument("--output", required=True, help="results.jsonl or results.csv")
+    parser.add_argument("--batch-size", type=int, default=config.PREDICT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=config.DECODE_WORKERS)
+    parser.add_argument("--no-resume", action="store_true", help="Start over instead of skipping finished images")
+    args = parser.parse_args()
+
+    paths = iter_directory(args.input) if args.input else iter_manifest(args.manifest)
+
+    # 1. Resume: skip everything already in the output file
+    done = set() if args.no_resume else completed_paths(args.output)
+    if done:
+        print(f"↩️  Resuming: {len(done)} images already predicted.")
+    paths = (p for p in paths if p not in done)
+
+    # Import here so --help works without loading TensorFlow
+    from src.inference_pipeline import predictor
+
+    # 2. Stream predictions, flushing after every batch so a crash loses at most one batch
+    writer = ResultWriter(args.output, append=not args.no_resume)
+    count, start = 0, time.perf_counter()
+    try:
+        for path, result in predictor.predict_batch(paths, batch_size=args.batch_size, workers=args.workers):
+            writer.write(path, result)
+            count += 1
+            if count % args.batch_size == 0:
+                writer.flush()
+                rate = count / (time.perf_counter() - start)
+                print(f"   {count} images ({rate:.1f} img/s)")
+    finally:
+        writer.flush()
+        writer.close()
+
+    print(f"✅ Done: {count} new predictions written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
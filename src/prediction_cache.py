@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import fcntl
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def make_cache_key(img_arr, model_version, tta_augmentations):
+    """Content hash of the decoded image + everything that changes the model output."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(np.ascontiguousarray(img_arr).tobytes())
+    h.update(repr(np.shape(img_arr)).encode())
+    h.update(str(model_version).encode())
+    h.update(",".join(tta_augmentations).encode())
+    return h.hexdigest()
+
+
+class PredictionCache:
+    """
+    Bounded LRU + TTL cache for averaged prediction vectors.
+
+    With `disk_dir` set, entries are also written as small JSON files so several
+    gunicorn workers on the same host can reuse each other's predictions. Every
+    `sweep_every` disk writes (and once at start) a background sweep deletes expired
+    files and, beyond `disk_max_bytes`, the oldest ones.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600, disk_dir=None,
+                 disk_max_bytes=0, sweep_every=1000):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.sweep_every = sweep_every
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._sweeping = threading.Lock()
+        self._disk_writes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._sweep_in_background()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.evictions += 1
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, value, now)
+        return value
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+        self._disk_put(key, value)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions, "entries": len(self._entries)}
+
+    def _store(self, key, value, now):
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # --- Shared on-disk backend ---
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def _disk_get(self, key, now):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl <= now:
+                os.remove(path)
+                return None
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key, value):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so other workers never read a half-written file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._disk_writes += 1
+            due = self.sweep_every and self._disk_writes % self.sweep_every == 0
+        if due:
+            self._sweep_in_background()
+
+    def _sweep_in_background(self):
+        if self._sweeping.acquire(blocking=False):  # One sweep per process at a time
+            def _run():
+                try:
+                    self.sweep()
+                except OSError as e:
+                    print(f"❌ Prediction cache sweep failed: {e!r}")
+                finally:
+                    self._sweeping.release()
+            threading.Thread(target=_run, name="cache-sweeper", daemon=True).start()
+
+    def sweep(self, now=None):
+        """
+        Deletes expired (and abandoned temp) files, then the oldest files while the directory
+        is over `disk_max_bytes` (down to 90% of it). Returns {"files", "bytes", "removed"},
+        or None when another process is sweeping.
+        """
+        if not self.disk_dir:
+            return None
+        now = now or time.time()
+        with open(os.path.join(self.disk_dir, ".sweep.lock"), 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            files = []  # (mtime, size, path)
+            removed = 0
+            for shard in os.scandir(self.disk_dir):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    if st.st_mtime + self.ttl <= now:
+                        removed += self._remove(entry.path)
+                    elif not entry.name.endswith(".tmp"):  # Never evict a write in progress
+                        files.append((st.st_mtime, st.st_size, entry.path))
+
+            total = sum(size for _, size, _ in files)
+            if self.disk_max_bytes and total > self.disk_max_bytes:
+                files.sort()
+                evicted = 0
+                while evicted < len(files) and total > self.disk_max_bytes * 0.9:
+                    removed += self._remove(files[evicted][2])
+                    total -= files[evicted][1]
+                    evicted += 1
+                files = files[evicted:]
+        return {"files": len(files), "bytes": total, "removed": removed}
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:  # Another worker got there first
+            return 0
@@ -1,50 +1,179 @@
 import os
+import json
 import shutil
-import random
+import hashlib
 import sys
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path to see config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
 
-def split_dataset(split_ratio=0.8):
-    print(f"🚀 Starting Data Split from {config.RAW_DATA_DIR}...")
-    
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+SPLIT_MODES = ("hardlink", "symlink", "copy")
+
+
+def file_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def assign_split(content_hash, split_ratio, seed):
+    """Deterministic split keyed on file content: stable across re-runs, renames and added files."""
+    digest = hashlib.blake2b(f"{seed}:{content_hash}".encode(), digest_size=8).digest()
+    return 'train' if int.from_bytes(digest, 'big') / 2 ** 64 < split_ratio else 'val'
+
+
+def load_manifest():
+    if os.path.exists(config.SPLIT_MANIFEST_PATH):
+        with open(config.SPLIT_MANIFEST_PATH, 'r') as f:
+            return json.load(f)
+    return {"files": {}}
+
+
+def save_manifest(manifest):
+    tmp = config.SPLIT_MANIFEST_PATH + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, config.SPLIT_MANIFEST_PATH)
+
+
+def is_current(src, dst, mode):
+    """True if `dst` already is the right link / copy of `src`."""
+    if not os.path.lexists(dst):
+        return False
+    if mode == 'symlink':
+        return os.path.islink(dst) and os.readlink(dst) == src
+    if os.path.islink(dst):
+        return False
+    if mode == 'hardlink' and os.path.samefile(src, dst):
+        return True
+    # A copy (also what 'hardlink' falls back to across filesystems): copy2 keeps size + mtime
+    src_st, dst_st = os.stat(src), os.stat(dst)
+    return src_st.st_size == dst_st.st_size and src_st.st_mtime_ns == dst_st.st_mtime_ns
+
+
+def place(src, dst, mode):
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if mode == 'symlink':
+        os.symlink(src, dst)
+        return
+    if mode == 'hardlink':
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass  # Different filesystem (or no hardlink support): fall back to copying
+    shutil.copy2(src, dst)
+
+
+def split_dataset(split_ratio=0.8, mode=None, workers=None, seed=None):
+    """
+    Incrementally materializes TRAIN_DIR / VAL_DIR from RAW_DATA_DIR.
+    Images are linked (or copied) in parallel, and re-runs only touch added,
+    removed or changed files. The split is recorded in config.SPLIT_MANIFEST_PATH.
+    """
+    mode = mode or config.SPLIT_MODE
+    workers = workers or config.SPLIT_WORKERS
+    seed = config.SEED if seed is None else seed
+    if mode not in SPLIT_MODES:
+        raise ValueError(f"Unknown split mode '{mode}'. Choose from {SPLIT_MODES}.")
+
+    print(f"🚀 Starting Data Split from {config.RAW_DATA_DIR} ({mode}, {workers} workers)...")
+
     if not os.path.exists(config.RAW_DATA_DIR):
         print(f"❌ Error: '{config.RAW_DATA_DIR}' not found. Please create it and add your class folders.")
         return
 
-    # Clean existing train/val to prevent duplication
-    if os.path.exists(config.TRAIN_DIR): shutil.rmtree(config.TRAIN_DIR)
-    if os.path.exists(config.VAL_DIR): shutil.rmtree(config.VAL_DIR)
-
-    classes = [d for d in os.listdir(config.RAW_DATA_DIR) if os.path.isdir(os.path.join(config.RAW_DATA_DIR, d))]
-    
+    classes = sorted(d for d in os.listdir(config.RAW_DATA_DIR) if os.path.isdir(os.path.join(config.RAW_DATA_DIR, d)))
     print(f"📊 Found {len(classes)} classes: {classes}")
 
+    # 1. Content hashes (cached in the manifest by size + mtime, so re-runs hash only new files)
+    manifest = load_manifest()
+    cached = manifest["files"]
+    raw_files = {}
     for class_name in classes:
         src_path = os.path.join(config.RAW_DATA_DIR, class_name)
-        images = [f for f in os.listdir(src_path) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-        
-        # Shuffle for randomness
-        random.shuffle(images)
-        split_point = int(len(images) * split_ratio)
-        
-        train_imgs = images[:split_point]
-        val_imgs = images[split_point:]
-
-        # Create subdirectories
+        for img in sorted(os.listdir(src_path)):
+            if img.lower().endswith(IMAGE_EXTENSIONS):
+                raw_files[f"{class_name}/{img}"] = os.path.join(src_path, img)
+
+    stamps = {}
+    to_hash = []
+    for rel, path in raw_files.items():
+        st = os.stat(path)
+        stamps[rel] = [st.st_size, st.st_mtime_ns]
+        entry = cached.get(rel)
+        if entry is None or entry[:2] != stamps[rel]:
+            to_hash.append(rel)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        hashes = dict(zip(to_hash, pool.map(lambda rel: file_hash(raw_files[rel]), to_hash)))
+    print(f"   Hashed {len(to_hash)} new/changed images ({len(raw_files) - len(to_hash)} cached)")
+
+    # 2. Decide the split for every image
+    wanted = {}  # destination path -> source path
+    files = {}
+    for rel, path in raw_files.items():
+        content_hash = hashes.get(rel) or cached[rel][2]
+        split = assign_split(content_hash, split_ratio, seed)
+        files[rel] = stamps[rel] + [content_hash, split]
+        split_dir = config.TRAIN_DIR if split == 'train' else config.VAL_DIR
+        wanted[os.path.join(split_dir, *rel.split('/'))] = os.path.abspath(path)
+
+    # 3. Remove classes that left the raw set (an empty folder would still count as a class),
+    #    then images that left the raw set or moved to the other split
+    removed = 0
+    for split_dir in (config.TRAIN_DIR, config.VAL_DIR):
+        if not os.path.exists(split_dir):
+            continue
+        for name in os.listdir(split_dir):
+            if name in classes:
+                continue
+            stale = os.path.join(split_dir, name)
+            if os.path.isdir(stale) and not os.path.islink(stale):
+                removed += sum(len(fnames) for _, _, fnames in os.walk(stale))
+                shutil.rmtree(stale)
+            else:
+                os.remove(stale)
+                removed += 1
+        for root, _, fnames in os.walk(split_dir):
+            for fname in fnames:
+                dst = os.path.join(root, fname)
+                if dst not in wanted:
+                    os.remove(dst)
+                    removed += 1
+
+    # 4. Link / copy what is missing or stale, in parallel
+    for class_name in classes:
         os.makedirs(os.path.join(config.TRAIN_DIR, class_name), exist_ok=True)
         os.makedirs(os.path.join(config.VAL_DIR, class_name), exist_ok=True)
 
-        # Copy files
-        print(f"   Processing {class_name}: {len(train_imgs)} Train, {len(val_imgs)} Val")
-        for img in train_imgs:
-            shutil.copy(os.path.join(src_path, img), os.path.join(config.TRAIN_DIR, class_name, img))
-        for img in val_imgs:
-            shutil.copy(os.path.join(src_path, img), os.path.join(config.VAL_DIR, class_name, img))
+    todo = [(src, dst) for dst, src in wanted.items() if not is_current(src, dst, mode)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda job: place(job[0], job[1], mode), todo))
+
+    manifest.update({"seed": seed, "split_ratio": split_ratio, "files": files})
+    save_manifest(manifest)
+
+    counts = Counter((rel.split('/')[0], f[3]) for rel, f in files.items())
+    for class_name in classes:
+        print(f"   {class_name}: {counts[(class_name, 'train')]} Train, {counts[(class_name, 'val')]} Val")
+
+    print(f"✅ Data Splitting Complete! {len(todo)} placed, {removed} removed, "
+          f"{len(wanted) - len(todo)} already up to date.")
 
-    print("✅ Data Splitting Complete!")
 
 if __name__ == "__main__":
-    split_dataset()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Split RAW_DATA_DIR into TRAIN_DIR / VAL_DIR (incremental).")
+    parser.add_argument("--ratio", type=float, default=0.8, help="Fraction of images used for training")
+    parser.add_argument("--mode", choices=SPLIT_MODES, default=None, help="Default: config.SPLIT_MODE")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    split_dataset(split_ratio=args.ratio, mode=args.mode, workers=args.workers)
@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import tensorflow as tf
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from src.data_pipeline import AUTOTUNE, ImageFolder, augment_batches, decode_and_resize
+
+# Shard layout (one directory per split, e.g. data/shards/train/):
+#   shard_00000.npy ...  uint8 [rows, H, W, 3] arrays, opened with mmap_mode='r' for training
+#   manifest.json        relpath -> [shard, row, size, mtime_ns] plus per-shard row counts
+MANIFEST = "manifest.json"
+
+
+def shard_path(out_dir, shard_id):
+    return os.path.join(out_dir, f"shard_{int(shard_id):05d}.npy")
+
+
+def load_manifest(out_dir, img_size):
+    path = os.path.join(out_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+        if tuple(manifest["img_size"]) == tuple(img_size):
+            return manifest
+        print(f"   IMG_SIZE changed ({manifest['img_size']} -> {list(img_size)}), repacking everything.")
+        for shard_id in manifest["shards"]:
+            if os.path.exists(shard_path(out_dir, shard_id)):
+                os.remove(shard_path(out_dir, shard_id))
+    return {"img_size": list(img_size), "entries": {}, "shards": {}}
+
+
+def save_manifest(out_dir, manifest):
+    # Write-then-rename: a crash mid-pack leaves the previous manifest intact
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + ".tmp", 'w') as f:
+        json.dump(manifest, f)
+    os.replace(path + ".tmp", path)
+
+
+def _file_stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _decode_uint8(paths, img_size):
+    """Parallel decode + resize, yielding uint8 batches in input order."""
+    ds = tf.data.Dataset.from_tensor_slices(paths)
+    ds = ds.map(lambda p: tf.cast(tf.round(tf.clip_by_value(decode_and_resize(p, img_size), 0, 255)), tf.uint8),
+                num_parallel_calls=AUTOTUNE, deterministic=True)
+    for batch in ds.batch(64).prefetch(AUTOTUNE):
+        yield batch.numpy()
+
+
+def _write_shards(out_dir, manifest, relpaths, batches, img_size, shard_size):
+    """Streams uint8 batches into new shard files, registering each row in the manifest."""
+    next_id = max((int(s) for s in manifest["shards"]), default=-1) + 1
+    remaining = len(relpaths)
+    pending = iter(relpaths)
+    shard, shard_id, row = None, None, 0
+
+    for batch in batches:
+        for img in batch:
+            if shard is None:
+                rows = min(shard_size, remaining)
+                shard_id, row = next_id, 0
+                shard = np.lib.format.open_memmap(shard_path(out_dir, shard_id), mode='w+',
+                                                  dtype=np.uint8, shape=(rows, img_size[0], img_size[1], 3))
+                manifest["shards"][str(shard_id)] = {"rows": rows, "live": 0}
+                next_id += 1
+            shard[row] = img
+            rel, stamp = next(pending)
+            manifest["entries"][rel] = [shard_id, row] + stamp
+            manifest["shards"][str(shard_id)]["live"] += 1
+            row += 1
+            remaining -= 1
+            if row == len(shard):
+                shard.flush()
+                shard = None
+    if shard is not None:
+        shard.flush()
+
+
+def _compact(out_dir, manifest, img_size, shard_size, min_live_fraction=0.5):
+    """
+    Rewrites shards that are mostly dead rows (deleted / changed images) into fresh shards.
+    Returns the ids of the retired shards; their files are only deleted by the caller once the
+    manifest that no longer references them is saved.
+    """
+    sparse = {sid for sid, s in manifest["shards"].items() if s["live"] < s["rows"] * min_live_fraction}
+    if not sparse:
+        return []
+    moving = sorted(rel for rel, e in manifest["entries"].items() if str(e[0]) in sparse)
+    print(f"   Compacting {len(sparse)} sparse shards ({len(moving)} live images).")
+
+    arrays = {sid: np.load(shard_path(out_dir, sid), mmap_mode='r') for sid in sparse}
+    old = [(str(manifest["entries"][rel][0]), manifest["entries"][rel][1]) for rel in moving]
+    batches = ([arrays[sid][row]] for sid, row in old)
+    stamps = [(rel, manifest["entries"][rel][2:]) for rel in moving]
+    _write_shards(out_dir, manifest, stamps, batches, img_size, shard_size)
+
+    for sid in sparse:
+        del manifest["shards"][sid]
+    del arrays
+    return sorted(sparse)
+
+
+def pack_split(split_dir, out_dir, img_size=None, shard_size=None):
+    """
+    Incrementally packs a class-per-folder split into uint8 shards.
+    Only images that are new or changed (size / mtime) since the last run get decoded.
+    Returns the ImageFolder index of the split.
+    """
+    img_size = tuple(img_size or config.IMG_SIZE)
+    shard_size = shard_size or config.SHARD_SIZE
+    os.makedirs(out_dir, exist_ok=True)
+
+    manifest = load_manifest(out_dir, img_size)
+    folder = ImageFolder(split_dir)
+    current = {os.path.relpath(p, split_dir): p for p in folder.filepaths}
+    stamps = {rel: _file_stamp(path) for rel, path in current.items()}
+
+    # 1. Retire entries whose image was removed or changed (their rows become dead space)
+    removed = 0
+    for rel, entry in list(manifest["entries"].items()):
+        if rel not in current or entry[2:] != stamps[rel]:
+            manifest["shards"][str(entry[0])]["live"] -= 1
+            del manifest["entries"][rel]
+            removed += 1
+
+    # 2. Decode + append new / changed images
+    todo = [rel for rel in current if rel not in manifest["entries"]]
+    if todo:
+        print(f"   Packing {len(todo)} images into {out_dir} ...")
+        batches = _decode_uint8([current[rel] for rel in todo], img_size)
+        _write_shards(out_dir, manifest, [(rel, stamps[rel]) for rel in todo], batches, img_size, shard_size)
+
+    # 3. Reclaim space left by removed images
+    retired = _compact(out_dir, manifest, img_size, shard_size)
+
+    if todo or removed or retired or not os.path.exists(os.path.join(out_dir, MANIFEST)):
+        save_manifest(out_dir, manifest)
+    # 4. Only now drop the compacted shards: a crash before the save leaves the old manifest
+    # pointing at files that still exist (the new shards are then just unreferenced)
+    for sid in retired:
+        os.remove(shard_path(out_dir, sid))
+    print(f"✅ {os.path.basename(split_dir)}: {len(todo)} packed, {removed} retired, "
+          f"{len(manifest['entries'])} images in {len(manifest['shards'])} shards.")
+    return folder
+
+
+class ShardStore:
+    """Read side: memory-maps every shard and gathers batches by (shard, row)."""
+
+    def __init__(self, out_dir):
+        with open(os.path.join(out_dir, MANIFEST), 'r') as f:
+            self.manifest = json.load(f)
+        self.arrays = {int(sid): np.load(shard_path(out_dir, sid), mmap_mode='r')
+                       for sid in self.manifest["shards"]}
+        self.img_size = tuple(self.manifest["img_size"])
+
+    def locate(self, relpath):
+        shard_id, row = self.manifest["entries"][relpath][:2]
+        return shard_id, row
+
+    def fetch(self, locations):
+        """locations: int [B, 2] of (shard, row) -> uint8 [B, H, W, 3], one read per shard."""
+        out = np.empty((len(locations), self.img_size[0], self.img_size[1], 3), dtype=np.uint8)
+        for shard_id in np.unique(locations[:, 0]):
+            mask = locations[:, 0] == shard_id
+            rows = locations[mask, 1]
+            order = np.argsort(rows)  # Sequential reads within the shard
+            picked = np.flatnonzero(mask)[order]
+            out[picked] = self.arrays[int(shard_id)][rows[order]]
+        return out
+
+
+def build_shard_dataset(split_dir, training, batch_size=None, seed=None, num_shards=1, shard_index=0):
+    """
+    Drop-in for data_pipeline.build_dataset that streams pre-decoded images from
+    memory-mapped shards (packing any new images first). Same ordering and labels,
+    so class weights and class_indices.json are unchanged.
+    """
+    batch_size = batch_size or config.BATCH_SIZE
+    seed = config.SEED if seed is None else seed
+    out_dir = os.path.join(config.SHARDS_DIR, os.path.basename(os.path.normpath(split_dir)))
+
+    folder = pack_split(split_dir, out_dir)
+    store = ShardStore(out_dir)
+    locations = np.array([store.locate(os.path.relpath(p, split_dir)) for p in folder.filepaths], dtype=np.int64)
+    height, width = store.img_size
+
+    def fetch(locs):
+        images = tf.numpy_function(store.fetch, [locs], tf.uint8)
+        images.set_shape([None, height, width, 3])
+        return tf.cast(images, tf.float32)
+
+    ds = tf.data.Dataset.from_tensor_slices((locations, folder.classes))
+    if num_shards > 1:
+        ds = ds.shard(num_shards, shard_index)
+    if training:
+        ds = ds.shuffle(ds.cardinality(), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    ds = ds.map(lambda locs, labels: (fetch(locs), tf.one_hot(labels, folder.num_classes)),
+                num_parallel_calls=AUTOTUNE)
+    if training:
+        ds = augment_batches(ds, seed)
+    return ds.prefetch(AUTOTUNE), folder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack TRAIN_DIR / VAL_DIR into pre-decoded uint8 shards (incremental).")
+    parser.add_argument("--shard-size", type=int, default=config.SHARD_SIZE, help="Images per shard file")
+    args = parser.parse_args()
+
+    for split_dir in (config.TRAIN_DIR, config.VAL_DIR):
+        out_dir = os.path.join(config.SHARDS_DIR, os.path.basename(split_dir))
+        pack_split(split_dir, out_dir, shard_size=args.shard_size)
+
+
+if __name__ == "__main__":
+    main()
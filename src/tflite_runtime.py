@@ -0,0 +1,111 @@
+import os
+import sys
+import threading
+import numpy as np
+
+# Connect to config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from src import metrics
+from src.image_io import decode_image_pil, read_image_bytes
+from src.inference_pipeline import DiseasePredictor, ModelEngine, model_file_version
+from src.inference_server import NUMPY_TTA, fit_to_input
+
+
+def load_interpreter(model_path, num_threads=None):
+    """Prefers the standalone LiteRT runtime (edge boxes), falls back to tf.lite."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=model_path, num_threads=num_threads)
+
+
+class TFLiteRunner:
+    """
+    `batch -> np.ndarray` callable around a TFLite interpreter.
+    Handles dynamic batch sizes and (de)quantization of int8/uint8 inputs and outputs.
+    The interpreter is not thread-safe, so calls are serialized.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        self.interpreter = load_interpreter(model_path, num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self.input['shape'][0])
+        self._lock = threading.Lock()
+
+    def __call__(self, batch):
+        batch = self._quantize(np.asarray(batch, dtype=np.float32), self.input)
+        with self._lock:
+            if len(batch) != self._batch_size:
+                self.interpreter.resize_tensor_input(self.input['index'], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+            self.interpreter.set_tensor(self.input['index'], batch)
+            self.interpreter.invoke()
+            out = self.interpreter.get_tensor(self.output['index'])
+        return self._dequantize(out, self.output)
+
+    @staticmethod
+    def _quantize(x, detail):
+        if detail['dtype'] in (np.uint8, np.int8):
+            scale, zero_point = detail['quantization']
+            info = np.iinfo(detail['dtype'])
+            x = np.clip(np.round(x / scale + zero_point), info.min, info.max)
+        return x.astype(detail['dtype'])
+
+    @staticmethod
+    def _dequantize(x, detail):
+        if detail['dtype'] in (np.uint8, np.int8):
+            scale, zero_point = detail['quantization']
+            return (x.astype(np.float32) - zero_point) * scale
+        return x.astype(np.float32)
+
+
+class TFLiteDiseasePredictor(DiseasePredictor):
+    """
+    Same predict_robust / predict_batch contract, backed by a quantized .tflite model.
+    Decoding and TTA run in numpy/PIL, so with ai-edge-litert installed TensorFlow is never imported.
+    """
+
+    def __init__(self, model_path=None):
+        self.tflite_path = model_path or config.TFLITE_MODEL_PATH
+        super().__init__(self.tflite_path)
+
+    def default_model_path(self):
+        return self.tflite_path
+
+    def _load_tta(self):
+        unknown = [a for a in self.tta_augmentations if a not in NUMPY_TTA]
+        if unknown or not self.tta_augmentations:
+            raise ValueError(f"Invalid TTA augmentations {list(self.tta_augmentations)}. Choose from {list(NUMPY_TTA)}.")
+        self._tta = self._numpy_tta
+
+    def _numpy_tta(self, img):
+        img = fit_to_input(img)
+        return np.stack([NUMPY_TTA[name](img) for name in self.tta_augmentations])
+
+    @staticmethod
+    def _decode(source):
+        with metrics.stage("decode"):
+            return decode_image_pil(read_image_bytes(source), config.IMG_SIZE)
+
+    def warm_up(self, engine=None):
+        engine = engine or self._engine
+        n_views = len(self.tta_augmentations)
+        batch_sizes = (n_views, config.MAX_BATCH_SIZE) if getattr(config, 'MICRO_BATCHING', False) else (n_views,)
+        for size in batch_sizes:
+            engine.predict_batch(np.zeros((size, config.IMG_SIZE[0], config.IMG_SIZE[1], 3), dtype=np.float32))
+        synthetic = np.random.default_rng(0).uniform(0, 255, (config.IMG_SIZE[0], config.IMG_SIZE[1], 3))
+        engine.predict_image(synthetic.astype(np.float32))
+
+    def _load_engine(self, path):
+        print(f"⚙️ Loading TFLite Model ({os.path.basename(path)})...")
+        runner = TFLiteRunner(path, config.TFLITE_NUM_THREADS)
+        return ModelEngine(version=model_file_version(path), path=path,
+                           predict_batch=runner,
+                           predict_image=lambda image: runner(self._tta(image)),
+                           inference_mode="tflite")
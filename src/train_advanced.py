@@ -1,25 +1,31 @@
 import os
 import json
 import sys
+import argparse
 import numpy as np
 import tensorflow as tf
 from sklearn.utils import class_weight
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, ReduceLROnPlateau
 
 # Connect to config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
-from src.model_builder import build_model
-
-def get_class_weights(train_generator):
+from src.model_builder import build_model, backbone_layers
+from src.data_pipeline import build_dataset, ImageFolder
+from src.shards import build_shard_dataset
+from src.feature_cache import train_head_on_cached_features
+from src.distributed import get_strategy, worker_info, is_chief, writable_path, distribute_dataset, fit
+from src.knowledge_base import compile_all
+from src.checkpointing import TrainingJournal, TrainingCheckpoint, epoch_seed, finish_phase, load_arrays, restore
+
+def get_class_weights(train_folder):
     """
     Calculates weights to balance the dataset.
     """
     weights = class_weight.compute_class_weight(
         class_weight='balanced',
-        classes=np.unique(train_generator.classes),
-        y=train_generator.classes
+        classes=np.unique(train_folder.classes),
+        y=train_folder.classes
     )
     return dict(enumerate(weights))
 
@@ -65,101 +71,159 @@ def create_auxiliary_files(class_indices):
     else:
         print("ℹ️  disease_info.py already exists. Skipping generation to protect your data.")
 
-def train_robust_model():
-    print("🔥 Starting AUTOMATED Training Pipeline...")
+    # 3. Compile the knowledge base for the new class map (indexed by class, one file per locale)
+    for path in compile_all():
+        print(f"   Compiled: {path}")
 
-    # 1. Setup Generators
-    train_datagen = ImageDataGenerator(
-        rotation_range=40,
-        width_shift_range=0.3,
-        height_shift_range=0.3,
-        shear_range=0.3,
-        zoom_range=0.3,
-        horizontal_flip=True,
-        fill_mode='nearest'
+def compile_model(model, learning_rate):
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+        loss="categorical_crossentropy",
+        metrics=["accuracy"],
+        jit_compile=config.JIT_COMPILE
     )
-    val_datagen = ImageDataGenerator()
 
-    print(f"   Loading Data from: {config.TRAIN_DIR}")
-    
-    train_generator = train_datagen.flow_from_directory(
-        config.TRAIN_DIR,
-        target_size=config.IMG_SIZE,
-        batch_size=config.BATCH_SIZE,
-        class_mode='categorical'
+def make_dataset(split_dir, training, seed=None, batch_size=None, num_shards=1, shard_index=0):
+    """Dataset for a split from the configured input path (JPEG tf.data pipeline or shards)."""
+    if config.USE_SHARDS:
+        return build_shard_dataset(split_dir, training=training, seed=seed, batch_size=batch_size,
+                                   num_shards=num_shards, shard_index=shard_index)
+    return build_dataset(split_dir, training=training, seed=seed, batch_size=batch_size, cache=config.DATASET_CACHE,
+                         num_shards=num_shards, shard_index=shard_index)
+
+def make_inputs(strategy, weights, seed):
+    """(train_ds, val_ds, extra fit() arguments) for the configured input path and strategy."""
+    # (config.USE_SHARDS streams pre-decoded, memory-mapped shards instead of JPEGs)
+    if strategy.num_replicas_in_sync > 1:
+        # Each worker reads its own shard of the files, batched per replica.
+        # Class weights travel as sample weights inside the pipeline.
+        train_ds, _, train_steps = distribute_dataset(strategy, make_dataset, config.TRAIN_DIR, True, weights, seed)
+        val_ds, _, val_steps = distribute_dataset(strategy, make_dataset, config.VAL_DIR, False)
+        return train_ds, val_ds, dict(steps_per_epoch=train_steps, validation_steps=val_steps)
+    train_ds, _ = make_dataset(config.TRAIN_DIR, training=True, seed=seed)
+    val_ds, _ = make_dataset(config.VAL_DIR, training=False)
+    return train_ds, val_ds, dict(class_weight=weights)
+
+def run_phase(model, strategy, journal, phase, epochs, callbacks, inputs, weights):
+    """fit() one phase, resuming from its latest checkpoint if an earlier run was interrupted."""
+    initial_epoch, state = restore(model, journal, phase)
+    if initial_epoch:
+        # Fresh seeds for the remaining epochs, so they don't replay the first epochs' shuffles / augmentations
+        tf.keras.utils.set_random_seed(epoch_seed(phase, initial_epoch))
+        inputs = make_inputs(strategy, weights, epoch_seed(phase, initial_epoch))
+    train_ds, val_ds, fit_args = inputs
+
+    checkpoint = TrainingCheckpoint(journal, phase, callbacks, every=config.CHECKPOINT_EVERY_EPOCHS,
+                                    resume_state=state)
+    fit(model, strategy,
+        train_ds,
+        epochs=epochs,
+        initial_epoch=initial_epoch,
+        validation_data=val_ds,
+        callbacks=callbacks + [checkpoint],
+        **fit_args
     )
 
-    val_generator = val_datagen.flow_from_directory(
-        config.VAL_DIR,
-        target_size=config.IMG_SIZE,
-        batch_size=config.BATCH_SIZE,
-        class_mode='categorical'
-    )
+def train_robust_model(fresh=False):
+    print("🔥 Starting AUTOMATED Training Pipeline...")
 
-    # 2. Save Class Map (JSON)
-    if not os.path.exists(config.MODELS_DIR): os.makedirs(config.MODELS_DIR)
-    
-    # Invert the map: {'Tomato': 0} -> {0: 'Tomato'}
-    indices_to_class = {v: k for k, v in train_generator.class_indices.items()}
-    with open(config.CLASS_INDICES_PATH, 'w') as f:
-        json.dump(indices_to_class, f)
+    # 0. Distribution (config.DISTRIBUTION_STRATEGY / TF_CONFIG); must exist before any other TF work
+    strategy = get_strategy()
+    num_workers = worker_info()[0]
 
-    # ============================================================
-    # 3. NEW STEP: Auto-Generate Python Helper Files
-    # ============================================================
-    create_auxiliary_files(train_generator.class_indices)
-    # ============================================================
+    # 1. Setup Input Pipelines (tf.data: parallel decode, batched in-graph augmentation, prefetch)
+    tf.keras.utils.set_random_seed(config.SEED)
+    print(f"   Loading Data from: {config.TRAIN_DIR}")
+    train_folder = ImageFolder(config.TRAIN_DIR)
+    val_folder = ImageFolder(config.VAL_DIR)
 
-    # 4. Calculate Weights
-    weights = get_class_weights(train_generator)
-    
-    # 5. Build Model
-    model = build_model(num_classes=train_generator.num_classes, 
-                        img_size=config.IMG_SIZE, 
-                        fine_tune=False)
+    # 2. Save Class Map (JSON)
+    if is_chief():
+        if not os.path.exists(config.MODELS_DIR): os.makedirs(config.MODELS_DIR)
 
-    model.compile(
-        optimizer=tf.keras.optimizers.Adam(learning_rate=config.LEARNING_RATE),
-        loss="categorical_crossentropy",
-        metrics=["accuracy"]
-    )
+        # Invert the map: {'Tomato': 0} -> {0: 'Tomato'}
+        indices_to_class = {v: k for k, v in train_folder.class_indices.items()}
+        with open(config.CLASS_INDICES_PATH, 'w') as f:
+            json.dump(indices_to_class, f)
+
+        # ============================================================
+        # 3. NEW STEP: Auto-Generate Python Helper Files
+        # ============================================================
+        create_auxiliary_files(train_folder.class_indices)
+        # ============================================================
 
+    # 4. Calculate Weights
+    weights = get_class_weights(train_folder)
+    inputs = make_inputs(strategy, weights, config.SEED)
+
+    # Progress journal: a re-run skips finished phases and resumes an interrupted one
+    run_key = {"classes": train_folder.class_indices, "img_size": list(config.IMG_SIZE),
+               "batch_size": config.BATCH_SIZE, "precision": config.PRECISION_POLICY}
+    journal = TrainingJournal(config.CHECKPOINT_DIR, run_key, fresh=fresh or not config.RESUME_TRAINING)
+    if journal.is_done("phase2"):
+        print(f"✅ This run already finished (see {journal.path}). Use --fresh to train again.")
+        return
+
+    # 5. Build Model (config.PRECISION_POLICY applies to every layer created from here on)
+    tf.keras.mixed_precision.set_global_policy(config.PRECISION_POLICY)
+    with strategy.scope():
+        model = build_model(num_classes=train_folder.num_classes,
+                            img_size=config.IMG_SIZE,
+                            fine_tune=False)
+
+        compile_model(model, config.LEARNING_RATE)
+
+    # Every worker runs the same callbacks; only the chief's ModelCheckpoint file is kept (the others
+    # write to a scratch dir). The journal, state checkpoints and phase weights are written by the chief only.
+    model_path = writable_path(config.MODEL_PATH)
     callbacks = [
-        ModelCheckpoint(config.MODEL_PATH, save_best_only=True, monitor='val_loss', mode='min'),
+        ModelCheckpoint(model_path, save_best_only=True, monitor='val_loss', mode='min'),
         EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True),
         ReduceLROnPlateau(monitor='val_loss', factor=0.2, patience=3, min_lr=1e-6)
     ]
 
     # 6. Train
-    print("\n🧠 Phase 1: Training Head...")
-    model.fit(
-        train_generator,
-        epochs=10,
-        validation_data=val_generator,
-        class_weight=weights,
-        callbacks=callbacks
-    )
+    if journal.is_done("phase1"):
+        print("\n⏭️  Phase 1 already finished, loading its weights...")
+        model.set_weights(load_arrays(journal.final_weights("phase1")))
+        best = journal.phase("phase1").get("model_checkpoint_best")
+        if best is not None:
+            callbacks[0].best = best
+    elif config.CACHED_FEATURES_PHASE1 and num_workers == 1:
+        # The base is frozen in phase 1, so its pooled features are computed once and cached
+        print("\n🧠 Phase 1: Training Head on cached backbone features...")
+        with strategy.scope():
+            val_loss = train_head_on_cached_features(model, lambda d, aug, seed: make_dataset(d, aug, seed)[0],
+                                                     train_folder, val_folder, weights, epochs=10)
+        # Same rule as ModelCheckpoint on the image path: only an improvement replaces the served model
+        checkpoint = callbacks[0]
+        if checkpoint.best is None or val_loss < checkpoint.best:
+            print(f"💾 Head val_loss {val_loss:.4f}: saving {model_path}")
+            model.save(model_path)
+            checkpoint.best = val_loss
+        finish_phase(journal, "phase1", model, tracked=callbacks)
+    else:
+        if config.CACHED_FEATURES_PHASE1:
+            print("ℹ️  CACHED_FEATURES_PHASE1 is single-worker only; training the head on images instead.")
+        print("\n🧠 Phase 1: Training Head...")
+        run_phase(model, strategy, journal, "phase1", 10, callbacks, inputs, weights)
 
     print("\n🧠 Phase 2: Fine-Tuning...")
-    base_model = model.layers[1]
-    base_model.trainable = True
-    for layer in base_model.layers[:-30]: layer.trainable = False
+    # Unfreeze the top 30 EfficientNet layers (the base is flattened into `model`). BatchNormalization
+    # layers stay frozen: small fine-tuning batches would overwrite their ImageNet statistics.
+    base_layers = backbone_layers(model)
+    for i, layer in enumerate(base_layers):
+        layer.trainable = i >= len(base_layers) - 30 and not isinstance(layer, tf.keras.layers.BatchNormalization)
 
-    model.compile(
-        optimizer=tf.keras.optimizers.Adam(learning_rate=1e-5),
-        loss="categorical_crossentropy",
-        metrics=["accuracy"]
-    )
+    with strategy.scope():
+        compile_model(model, 1e-5)
 
-    model.fit(
-        train_generator,
-        epochs=config.EPOCHS,
-        validation_data=val_generator,
-        class_weight=weights,
-        callbacks=callbacks
-    )
+    run_phase(model, strategy, journal, "phase2", config.EPOCHS, callbacks, inputs, weights)
 
     print("✅ Training Complete. All system files generated.")
 
 if __name__ == "__main__":
-    train_robust_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Two-phase EfficientNet training (resumes an interrupted run).")
+    parser.add_argument("--fresh", action="store_true", help="Ignore saved progress and train from scratch")
+    args = parser.parse_args()
+    train_robust_model(fresh=args.fresh)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make `config`, `src` and `web` importable from the tests
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
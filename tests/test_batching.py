@@ -0,0 +1,32 @@
+import threading
+
+import numpy as np
+
+from src.batching import MicroBatcher
+
+
+def test_batches_never_exceed_max_batch_size():
+    release = threading.Event()
+    pass_sizes = []
+
+    def predict(batch):
+        release.wait(5)
+        pass_sizes.append(len(batch))
+        return batch[:, :1] * 2
+
+    batcher = MicroBatcher(predict, max_batch_size=10, max_wait_ms=50)
+    futures = [batcher.submit(np.full((4, 3), i, dtype=np.float32)) for i in range(6)]
+    release.set()
+    results = [f.result(timeout=5) for f in futures]
+    batcher.stop()
+
+    assert max(pass_sizes) <= 10
+    assert sum(pass_sizes) == 24
+    for i, result in enumerate(results):
+        assert result.shape == (4, 1) and (result == 2 * i).all()
+
+
+def test_oversized_request_runs_alone():
+    batcher = MicroBatcher(lambda batch: batch, max_batch_size=4, max_wait_ms=1)
+    assert len(batcher.predict(np.zeros((6, 2)), timeout=5)) == 6
+    batcher.stop()
@@ -0,0 +1,15 @@
+from PIL import Image
+
+from src.data_pipeline import ImageFolder, decode_and_resize
+
+
+def test_image_folder_only_indexes_decodable_files(tmp_path):
+    class_dir = tmp_path / "Tomato_healthy"
+    class_dir.mkdir()
+    for ext in ("png", "jpg", "bmp", "ppm", "tif", "tiff"):
+        Image.new("RGB", (8, 8), (0, 128, 0)).save(class_dir / f"leaf.{ext}")
+
+    folder = ImageFolder(str(tmp_path))
+    assert sorted(p.rsplit(".", 1)[1] for p in folder.filepaths) == ["bmp", "jpg", "png"]
+    for path in folder.filepaths:
+        assert tuple(decode_and_resize(path, (4, 4)).shape) == (4, 4, 3)
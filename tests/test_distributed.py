@@ -0,0 +1,16 @@
+import pytest
+
+pytest.importorskip("tensorflow")
+from src.distributed import TESTED_KERAS_RANGE, check_keras_version
+
+
+def test_tested_keras_versions_pass():
+    low, high = TESTED_KERAS_RANGE
+    check_keras_version(f"{low[0]}.{low[1]}.0")
+    check_keras_version(f"{high[0]}.{high[1]}.9")
+
+
+@pytest.mark.parametrize("version", ["2.15.0", "3.12.1", "3.16.0", "4.0.0"])
+def test_untested_keras_versions_fail_fast(version):
+    with pytest.raises(RuntimeError, match=version):
+        check_keras_version(version)
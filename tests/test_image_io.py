@@ -0,0 +1,50 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.image_io import decode_image_pil, decode_image_resized, resize_bilinear
+
+tf = pytest.importorskip("tensorflow")
+
+TARGET = (224, 224)
+# Both decoders use libjpeg's ISLOW IDCT at the same DCT scale and the same bilinear
+# resize: they agree exactly here. One gray level leaves room for libjpeg build differences.
+MAX_PIXEL_DIFF = 1.0
+
+
+def photo(height, width, seed=0):
+    """Smooth, noisy RGB content (closer to a photo than pure noise)."""
+    rng = np.random.default_rng(seed)
+    small = (rng.random((max(8, height // 16), max(8, width // 16), 3)) * 255).astype(np.uint8)
+    img = np.asarray(Image.fromarray(small).resize((width, height), Image.BICUBIC), dtype=np.int16)
+    return np.clip(img + rng.integers(-20, 20, img.shape), 0, 255).astype(np.uint8)
+
+
+def encode(arr, mode='RGB', **save_kwargs):
+    buf = io.BytesIO()
+    Image.fromarray(arr).convert(mode).save(buf, **{"format": "JPEG", "quality": 90, **save_kwargs})
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("height,width", [(224, 224), (300, 400), (1080, 1440), (601, 1999), (3000, 2000)])
+def test_pil_and_tf_decoders_agree_on_jpegs(height, width):
+    data = encode(photo(height, width))
+    local, remote = decode_image_resized(data, TARGET), decode_image_pil(data, TARGET)
+    assert local.shape == remote.shape == TARGET + (3,)
+    assert np.abs(local - remote).max() <= MAX_PIXEL_DIFF
+
+
+@pytest.mark.parametrize("mode,save_kwargs", [
+    ('RGB', {"progressive": True}), ('RGB', {"subsampling": 0}), ('L', {}), ('RGBA', {"format": "PNG"})])
+def test_pil_and_tf_decoders_agree_on_other_encodings(mode, save_kwargs):
+    data = encode(photo(900, 1200, seed=1), mode, **save_kwargs)
+    assert np.abs(decode_image_resized(data, TARGET) - decode_image_pil(data, TARGET)).max() <= MAX_PIXEL_DIFF
+
+
+@pytest.mark.parametrize("shape", [(224, 224), (100, 150), (999, 333), (2000, 3000)])
+def test_resize_bilinear_matches_tf_image_resize(shape):
+    img = photo(*shape).astype(np.float32)
+    expected = tf.image.resize(img, TARGET).numpy()
+    np.testing.assert_allclose(resize_bilinear(img, TARGET), expected, atol=1e-3)
@@ -0,0 +1,16 @@
+import numpy as np
+
+import config
+from src.inference_pipeline import DECODE_ERROR_MESSAGE, DiseasePredictor, ModelEngine
+
+
+def test_unreadable_image_gets_a_fixed_message(capsys, monkeypatch):
+    monkeypatch.setattr(config, "MICRO_BATCHING", False)
+    predictor = DiseasePredictor.__new__(DiseasePredictor)  # No model: nothing reaches the forward pass
+    predictor._engine = ModelEngine(version="v1", path=None, predict_batch=np.asarray,
+                                    predict_image=np.asarray, inference_mode="keras")
+    predictor.cache = None
+
+    [(_, result)] = predictor.predict_batch([b"GIF89a not really an image"], batch_size=1, workers=1)
+    assert result == {"status": "Error", "message": DECODE_ERROR_MESSAGE}
+    assert "Could not read image #0 of the batch" in capsys.readouterr().out
@@ -0,0 +1,39 @@
+import os
+import json
+import multiprocessing
+
+import config
+from src import knowledge_base as kb
+
+
+def _compile_repeatedly(knowledge_dir, rounds):
+    config.KNOWLEDGE_DIR = knowledge_dir
+    for _ in range(rounds):
+        kb.compile_locale(config.DEFAULT_LOCALE)
+
+
+def test_concurrent_compiles_do_not_collide(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "KNOWLEDGE_DIR", str(tmp_path))
+    # fork: the children inherit the patched config
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_compile_repeatedly, args=(str(tmp_path), 5)) for _ in range(6)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    assert [p.exitcode for p in procs] == [0] * len(procs)
+
+    assert sorted(os.listdir(tmp_path)) == [f"{config.DEFAULT_LOCALE}.json"]  # No temp files left behind
+    with open(kb.compiled_path(config.DEFAULT_LOCALE), encoding='utf-8') as f:
+        compiled = json.load(f)
+    assert compiled["fingerprint"] == kb.source_fingerprint(config.DEFAULT_LOCALE)
+    assert len(compiled["classes"]) == max(kb.load_class_names()) + 1
+
+
+def test_stale_file_is_recompiled_on_load(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "KNOWLEDGE_DIR", str(tmp_path))
+    path = kb.compile_locale(config.DEFAULT_LOCALE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"fingerprint": "stale", "locale": "en", "classes": []}, f)
+    entries = kb.KnowledgeBase().entries(config.DEFAULT_LOCALE)
+    assert len(entries) == max(kb.load_class_names()) + 1
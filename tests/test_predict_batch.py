@@ -0,0 +1,30 @@
+import csv
+import json
+
+from src.predict_batch import ResultWriter, completed_paths
+
+RESULT = {"status": "Success", "prediction": "Tomato Early blight", "confidence": "91.0%"}
+
+
+def test_torn_csv_row_is_predicted_again(tmp_path):
+    output = str(tmp_path / "results.csv")
+    writer = ResultWriter(output, append=False)
+    writer.write("a.jpg", RESULT)
+    writer.close()
+    with open(output, 'a') as f:
+        f.write("b.jpg,Succ")  # Crash in the middle of the second row
+
+    done = completed_paths(output)
+    writer = ResultWriter(output, append=True)
+    assert done == {"a.jpg"}
+    writer.write("b.jpg", RESULT)
+    writer.close()
+    with open(output, newline='') as f:
+        assert [row["path"] for row in csv.DictReader(f)] == ["a.jpg", "b.jpg"]
+
+
+def test_torn_jsonl_line_is_predicted_again(tmp_path):
+    output = str(tmp_path / "results.jsonl")
+    with open(output, 'w') as f:
+        f.write(json.dumps({"path": "a.jpg", **RESULT}) + "\n" + '{"path": "b.jpg", "sta')
+    assert completed_paths(output) == {"a.jpg"}
@@ -0,0 +1,49 @@
+import os
+import time
+
+from src.prediction_cache import PredictionCache
+
+
+def disk_files(cache_dir):
+    return [os.path.join(root, f) for root, _, fnames in os.walk(cache_dir)
+            for f in fnames if f.endswith(".json")]
+
+
+def test_sweep_deletes_expired_files(tmp_path):
+    cache = PredictionCache(ttl_seconds=60, disk_dir=str(tmp_path), sweep_every=0)
+    for i in range(5):
+        cache.put(f"{i:02x}key", [0.1, 0.9])
+    old = time.time() - 120
+    for path in disk_files(tmp_path)[:3]:
+        os.utime(path, (old, old))
+
+    result = cache.sweep()
+    assert result["removed"] == 3
+    assert len(disk_files(tmp_path)) == 2
+
+
+def test_sweep_caps_directory_size_oldest_first(tmp_path):
+    cache = PredictionCache(ttl_seconds=3600, disk_dir=str(tmp_path), sweep_every=0)
+    now = time.time()
+    for i in range(20):
+        key = f"{i:02x}key"
+        cache.put(key, [float(i)] * 50)
+        os.utime(cache._disk_path(key), (now - 100 + i, now - 100 + i))
+    size = os.path.getsize(disk_files(tmp_path)[0])
+    cache.disk_max_bytes = 10 * size
+
+    result = cache.sweep()
+    assert result["bytes"] <= cache.disk_max_bytes
+    kept = sorted(os.path.basename(p) for p in disk_files(tmp_path))
+    assert kept == [f"{i:02x}key.json" for i in range(20 - len(kept), 20)]  # The newest survive
+
+
+def test_disk_writes_trigger_a_background_sweep(tmp_path):
+    cache = PredictionCache(ttl_seconds=3600, disk_dir=str(tmp_path), disk_max_bytes=1, sweep_every=5)
+    for i in range(5):
+        cache.put(f"{i:02x}key", [0.5, 0.5])
+    deadline = time.time() + 5
+    while disk_files(tmp_path) and time.time() < deadline:
+        time.sleep(0.01)
+    assert disk_files(tmp_path) == []
+    assert cache.get("00key") == [0.5, 0.5]  # Still served from memory
@@ -0,0 +1,62 @@
+import os
+import shutil
+
+import pytest
+
+import config
+from src.preprocess import split_dataset
+
+
+@pytest.fixture
+def data_dirs(tmp_path, monkeypatch):
+    raw = tmp_path / "raw"
+    for class_name in ("Tomato_Early_blight", "Tomato_healthy"):
+        (raw / class_name).mkdir(parents=True)
+        for i in range(6):
+            (raw / class_name / f"{i}.jpg").write_bytes(f"{class_name}-{i}".encode())
+    monkeypatch.setattr(config, "RAW_DATA_DIR", str(raw))
+    monkeypatch.setattr(config, "TRAIN_DIR", str(tmp_path / "train"))
+    monkeypatch.setattr(config, "VAL_DIR", str(tmp_path / "val"))
+    monkeypatch.setattr(config, "SPLIT_MANIFEST_PATH", str(tmp_path / "split_manifest.json"))
+    return raw
+
+
+def split_files(split_dir):
+    return sorted(os.path.relpath(os.path.join(root, f), split_dir)
+                  for root, _, fnames in os.walk(split_dir) for f in fnames)
+
+
+@pytest.mark.parametrize("mode", ["hardlink", "symlink", "copy"])
+def test_removed_class_leaves_no_directory(data_dirs, mode):
+    split_dataset(mode=mode, workers=2)
+    assert config.get_classes() == ["Tomato_Early_blight", "Tomato_healthy"]
+
+    shutil.rmtree(data_dirs / "Tomato_healthy")
+    split_dataset(mode=mode, workers=2)
+
+    assert config.get_classes() == ["Tomato_Early_blight"]
+    for split_dir in (config.TRAIN_DIR, config.VAL_DIR):
+        assert os.listdir(split_dir) == ["Tomato_Early_blight"]
+    assert len(split_files(config.TRAIN_DIR)) + len(split_files(config.VAL_DIR)) == 6
+
+
+def test_renamed_class_moves_its_images(data_dirs):
+    split_dataset(workers=2)
+    os.rename(data_dirs / "Tomato_healthy", data_dirs / "Tomato_Healthy_leaf")
+    split_dataset(workers=2)
+
+    assert config.get_classes() == ["Tomato_Early_blight", "Tomato_Healthy_leaf"]
+    files = split_files(config.TRAIN_DIR) + split_files(config.VAL_DIR)
+    assert len(files) == 12
+    assert not any(f.startswith("Tomato_healthy") for f in files)
+
+
+def test_hardlink_fallback_copies_are_not_placed_again(data_dirs, monkeypatch, capsys):
+    def no_link(src, dst):
+        raise OSError(18, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", no_link)  # Raw data on another filesystem
+    split_dataset(mode="hardlink", workers=2)
+    capsys.readouterr()
+    split_dataset(mode="hardlink", workers=2)
+    assert "0 placed, 0 removed, 12 already up to date" in capsys.readouterr().out
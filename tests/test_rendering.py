@@ -0,0 +1,43 @@
+import os
+
+import pytest
+from flask import Flask, render_template
+
+import config
+from src.knowledge_base import knowledge_base
+from web.rendering import ResultPageCache
+
+TEMPLATES = os.path.join(config.BASE_DIR, 'web', 'templates')
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "KNOWLEDGE_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "RENDER_CACHE", True)
+    app = Flask(__name__, template_folder=TEMPLATES)
+    app.jinja_env.auto_reload = False
+    with app.test_request_context('/predict'):
+        yield app
+
+
+def success_results():
+    for idx, entry in enumerate(knowledge_base.entries()):
+        if entry["status"] == "Success":
+            yield {**entry, "class_index": idx, "confidence": "87.5%", "model_version": 'v1<&>"'}
+
+
+def test_cached_page_matches_a_live_render(app):
+    pages = ResultPageCache()
+    img_src = '/static/uploads/thumbs/ab/x.jpg?a=1&b="2"'
+    for data in success_results():
+        for _ in range(2):  # Compile, then served from the cache
+            assert pages.render(img_src, data, "en") == render_template('result.html', img_src=img_src, data=data)
+
+
+def test_classes_with_the_same_text_get_their_own_page(app):
+    pages = ResultPageCache()
+    first, second = list(success_results())[:2]
+    twin = {**first, "class_index": second["class_index"], "symptoms": ("Only on the twin class",)}
+    assert "Only on the twin class" not in pages.render("/a.jpg", first, "en")
+    assert "Only on the twin class" in pages.render("/a.jpg", twin, "en")
+    assert len(pages._pages) == 2
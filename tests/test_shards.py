@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src import shards
+from src.shards import MANIFEST, load_manifest, pack_split, shard_path
+
+IMG_SIZE = (8, 8)
+
+
+@pytest.fixture
+def split_dir(tmp_path):
+    class_dir = tmp_path / "split" / "Tomato_healthy"
+    class_dir.mkdir(parents=True)
+    for i in range(8):
+        Image.new("RGB", (16, 16), (i * 30, 100, 50)).save(class_dir / f"{i}.png")
+    return tmp_path / "split"
+
+
+def test_compaction_saves_manifest_before_deleting_shards(split_dir, tmp_path, monkeypatch):
+    out_dir = str(tmp_path / "shards")
+    pack_split(str(split_dir), out_dir, img_size=IMG_SIZE, shard_size=4)
+    for i in range(1, 8):
+        os.remove(split_dir / "Tomato_healthy" / f"{i}.png")
+
+    # A crash while saving: the previous manifest must still point at existing shards
+    def crash(out_dir, manifest):
+        raise RuntimeError("crash")
+    monkeypatch.setattr(shards, "save_manifest", crash)
+    with pytest.raises(RuntimeError):
+        pack_split(str(split_dir), out_dir, img_size=IMG_SIZE, shard_size=4)
+    manifest = load_manifest(out_dir, IMG_SIZE)
+    for shard_id in manifest["shards"]:
+        assert os.path.exists(shard_path(out_dir, shard_id))
+
+    monkeypatch.undo()
+    pack_split(str(split_dir), out_dir, img_size=IMG_SIZE, shard_size=4)
+    manifest = load_manifest(out_dir, IMG_SIZE)
+    assert list(manifest["entries"]) == ["Tomato_healthy/0.png"]
+    shard_id, row = manifest["entries"]["Tomato_healthy/0.png"][:2]
+    assert np.load(shard_path(out_dir, shard_id))[row][0, 0, 0] == 0
+    assert sorted(os.listdir(out_dir)) == sorted([MANIFEST] + [os.path.basename(shard_path(out_dir, s))
+                                                               for s in manifest["shards"]])
@@ -0,0 +1,28 @@
+import os
+
+import config
+from web.upload_store import UploadStore
+
+
+def test_compaction_skips_temp_files_renamed_during_the_pass(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "UPLOAD_QUOTA_BYTES", 0)
+    monkeypatch.setattr(config, "UPLOAD_RETENTION_DAYS", 0)
+    store = UploadStore(str(tmp_path))
+    store.write("audit", "ab" * 16, b"x" * 100)
+    tmp = store.path("audit", "cd" * 16) + ".123.456.tmp"
+    os.makedirs(os.path.dirname(tmp))
+    with open(tmp, 'wb') as f:
+        f.write(b"y" * 50)
+
+    scan = store._scan
+
+    def scan_then_rename(kind):
+        entries = list(scan(kind))
+        if os.path.exists(tmp):
+            os.replace(tmp, store.path("audit", "cd" * 16))  # The writer finishes after the listing
+        yield from entries
+
+    monkeypatch.setattr(store, "_scan", scan_then_rename)
+    result = store.compact()
+    assert result["stored"]["audit"] == 100  # The renamed file is counted on the next pass
+    assert os.path.exists(store.path("audit", "cd" * 16))
@@ -1,26 +1,123 @@
 import os
 import sys
-from flask import Flask, render_template, request, redirect, url_for, flash
+import hmac
+import time
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify, g
 from werkzeug.utils import secure_filename
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
-from src.inference_pipeline import predictor  # The Robust Brain
+from src.inference_pipeline import predictor, readiness, warm_up_in_background, watch_model_file  # The Robust Brain (loads lazily)
+from src import metrics
+from src.knowledge_base import knowledge_base
+from src.image_io import make_thumbnail
+from web.rendering import result_pages
+from web.upload_store import upload_store, content_digest
 
 app = Flask(__name__)
 app.secret_key = "super_secret_key_for_flash_messages" # Needed for safety
 
 # Configure Upload Folder
-UPLOAD_FOLDER = os.path.join(config.BASE_DIR, 'web', 'static', 'uploads')
+UPLOAD_FOLDER = config.UPLOAD_DIR
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+app.config['MAX_CONTENT_LENGTH'] = config.MAX_UPLOAD_BYTES
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = config.STATIC_MAX_AGE  # /static responses also carry an ETag (304 on revalidation)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 
+# Disk persistence runs off the request path
+upload_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-writer")
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def read_upload(file):
+    """
+    Reads an upload into memory; the downscaled audit copy (if enabled) is stored in the
+    background. Returns (client filename, bytes, content digest).
+    """
+    filename = secure_filename(file.filename)
+    with metrics.stage("upload"):
+        data = file.read()
+    digest = content_digest(data)
+    if config.SAVE_UPLOADS:
+        upload_writer.submit(upload_store.save_audit_copy, data, digest)
+    return filename, data, digest
+
+def request_locale():
+    """Knowledge-base language: ?lang=xx, else the best Accept-Language match (default locale otherwise)."""
+    lang = request.args.get('lang')
+    if lang in knowledge_base.locales():
+        return lang
+    return request.accept_languages.best_match(knowledge_base.locales()) or config.DEFAULT_LOCALE
+
+def image_src(data, digest):
+    """
+    Result-page image: a small JPEG thumbnail instead of the multi-megabyte upload. Kept in
+    the upload store (written before the page links to it), or inlined when uploads aren't kept.
+    """
+    if config.SAVE_UPLOADS:
+        return url_for('static', filename='uploads/' + upload_store.thumbnail(data, digest))
+    with metrics.stage("thumbnail"):
+        thumb = make_thumbnail(data, config.THUMBNAIL_SIZE, config.THUMBNAIL_QUALITY)
+    return f"data:image/jpeg;base64,{base64.b64encode(thumb).decode('ascii')}"
+
+# Load + warm the model in the background: the worker starts serving (and answering
+# /healthz) immediately, and /readyz flips to 200 once inference is fast.
+if config.WARMUP_ON_START:
+    warm_up_in_background()
+
+# Pick up a new model file without restarting the worker (loaded + warmed before the swap)
+if config.MODEL_WATCH_INTERVAL:
+    watch_model_file()
+
+# Keep the upload store within its age / size quotas
+if config.SAVE_UPLOADS and config.UPLOAD_COMPACT_INTERVAL:
+    upload_store.start_compactor()
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def add_model_version(response):
+    # The version that actually answered this request (set by the prediction routes)
+    if 'model_version' in g:
+        response.headers['X-Model-Version'] = g.model_version
+    if 'request_start' in g and request.endpoint != 'metrics_endpoint':
+        metrics.observe_request(request.endpoint or "unknown", response.status_code,
+                                time.perf_counter() - g.request_start)
+    return response
+
+@app.after_request
+def add_cache_headers(response):
+    # Uploads and thumbnails are content-addressed: safe to cache for good
+    if request.path.startswith('/static/uploads/') and response.status_code in (200, 304):
+        response.cache_control.public = True
+        response.cache_control.max_age = config.UPLOAD_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({"status": "alive"})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    state = readiness()
+    return jsonify(state), (200 if state["ready"] else 503)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Per-stage latency, batch sizes, queue depth and outcomes (Prometheus text format)."""
+    if not metrics.enabled():
+        return jsonify({"error": "Metrics are disabled (config.METRICS_ENABLED)."}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/', methods=['GET'])
 def index():
     return render_template('index.html')
@@ -39,20 +136,21 @@ def predict():
         return redirect(request.url)
 
     if file and allowed_file(file.filename):
-        # 2. Save File Securely
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # 2. Read the upload into memory (optionally persisted in the background)
+        _, data, digest = read_upload(file)
 
         # 3. call the ROBUST PIPELINE (The Brain)
         # This uses TTA (Test Time Augmentation) and Confidence Checks
-        result = predictor.predict_robust(filepath)
+        locale = request_locale()
+        result = predictor.predict_robust(data, locale=locale)
+        g.model_version = result['model_version']
 
         # 4. Handle different outcomes
         if result['status'] == 'Success':
-            return render_template('result.html', 
-                                   img_filename=filename, 
-                                   data=result)
+            img_src = image_src(data, digest)
+            with metrics.stage("render"):
+                # Pre-rendered per class; only the image, confidence and version are filled in
+                return result_pages.render(img_src, result, locale)
         
         elif result['status'] == 'Unsure':
             flash(f"⚠️ {result['message']} (Confidence: {result['confidence']})")
@@ -65,6 +163,73 @@ def predict():
     flash('Invalid file type. Please upload JPG or PNG.')
     return redirect(url_for('index'))
 
+@app.route('/api/v1/predict', methods=['POST'])
+def api_predict():
+    """
+    JSON API for mobile clients. Accepts one or more images as multipart fields
+    named 'files' (or 'file'); all valid images run through the model as one batch.
+    """
+    files = [f for f in request.files.getlist('files') + request.files.getlist('file') if f.filename]
+    if not files:
+        return jsonify({"error": "No files uploaded. Send images as multipart field 'files'."}), 400
+    if len(files) > config.API_MAX_FILES:
+        return jsonify({"error": f"Too many files ({len(files)}). Maximum is {config.API_MAX_FILES}."}), 413
+
+    # 1. Read valid uploads, remember where rejected ones go in the response
+    results = [None] * len(files)
+    batch = []  # (position, filename, bytes)
+    for i, file in enumerate(files):
+        if allowed_file(file.filename):
+            filename, data, _ = read_upload(file)
+            batch.append((i, filename, data))
+        else:
+            results[i] = {"filename": file.filename, "status": "Error",
+                          "message": "Invalid file type. Please upload JPG or PNG."}
+
+    # 2. One model batch for the whole request
+    if batch:
+        predictions = predictor.predict_batch((data for _, _, data in batch), batch_size=len(batch),
+                                              locale=request_locale())
+        for (i, filename, _), (_, result) in zip(batch, predictions):
+            results[i] = {"filename": filename, **result}
+            if 'model_version' in result:
+                g.model_version = result['model_version']
+
+    return jsonify({"count": len(results), "results": results})
+
+@app.route('/api/v1/model', methods=['GET'])
+def model_info():
+    """Active model version and the warm pool (for checking a rollout)."""
+    return jsonify(predictor.pool_info())
+
+@app.route('/api/v1/model', methods=['POST'])
+def model_swap():
+    """
+    Hot-swap (admin only, X-Admin-Token): {"version": "<hash>"} switches to a version in the
+    warm pool instantly; {"path": "<file in models/>"} loads, warms and swaps in a new file
+    in the background. Without a body the configured model file is reloaded.
+    """
+    # Constant-time comparison: the response time must not reveal how much of the token matched
+    if not config.ADMIN_TOKEN or not hmac.compare_digest(
+            request.headers.get('X-Admin-Token', '').encode(), config.ADMIN_TOKEN.encode()):
+        return jsonify({"error": "Forbidden"}), 403
+
+    body = request.get_json(silent=True) or {}
+    if body.get('version'):
+        try:
+            return jsonify({"active": predictor.activate_version(body['version'])})
+        except KeyError as e:
+            return jsonify({"error": str(e)}), 404
+
+    path = body.get('path')
+    if path:
+        path = os.path.realpath(os.path.join(config.MODELS_DIR, path))
+        if not path.startswith(os.path.realpath(config.MODELS_DIR) + os.sep) or not os.path.isfile(path):
+            return jsonify({"error": "Model file not found in the models directory."}), 404
+    predictor.load_version_in_background(path)
+    return jsonify({"status": "loading", **predictor.pool_info()}), 202
+
 if __name__ == '__main__':
     # Run on all interfaces for local network testing
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # threaded=True lets concurrent uploads share forward passes via the micro-batcher
+    app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""
+Async serving entry point:
+
+    uvicorn web.asgi:app --host 0.0.0.0 --port 8000
+
+Request bodies are received on the event loop, so slow uploads (rural 2G) cost no
+worker thread. Only a fully received request is handed to the Flask app, and
+inference requests run on a bounded thread pool. When that pool and its queue are
+full, the server answers 503 with Retry-After instead of letting latency grow.
+"""
+import io
+import os
+import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from src import metrics
+from web.app import app as flask_app
+
+INFERENCE_PATHS = {'/predict', '/api/v1/predict'}
+
+
+def build_environ(scope, body):
+    """Minimal WSGI environ for an ASGI HTTP scope whose body has already been received."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        key = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if key == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif key != 'CONTENT_LENGTH':
+            key = 'HTTP_' + key
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def run_wsgi(wsgi_app, environ):
+    """Runs the WSGI app to completion and returns (status_code, headers, body)."""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+    chunks = wsgi_app(environ, start_response)
+    try:
+        body = b''.join(chunks)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+    return response['status'], response['headers'], body
+
+
+class BoundedWSGIServer:
+    """ASGI wrapper around a WSGI app with a bounded inference pool and 503 backpressure."""
+
+    def __init__(self, wsgi_app, workers, queue_size, retry_after, max_body_bytes):
+        self.wsgi_app = wsgi_app
+        self.capacity = workers + queue_size
+        self.retry_after = retry_after
+        self.max_body_bytes = max_body_bytes
+        self.in_flight = 0
+        self.inference_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        self.light_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="wsgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+
+        # 1. Receive the whole body on the event loop (no thread held by slow uploads)
+        body = bytearray()
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if len(body) > self.max_body_bytes:
+                metrics.observe_rejected("too_large")
+                return await self._respond(send, 413, b'Upload too large.')
+
+        # 2. Backpressure: refuse inference work once the pool and queue are full
+        is_inference = scope['method'] == 'POST' and scope['path'] in INFERENCE_PATHS
+        if is_inference:
+            if self.in_flight >= self.capacity:
+                metrics.observe_rejected("busy")
+                return await self._respond(send, 503, b'Server busy, please retry.',
+                                           [(b'retry-after', str(self.retry_after).encode())])
+            self.in_flight += 1
+            metrics.set_in_flight(self.in_flight)
+
+        # 3. Decode + inference on the bounded pool
+        pool = self.inference_pool if is_inference else self.light_pool
+        loop = asyncio.get_running_loop()
+        try:
+            status, headers, payload = await loop.run_in_executor(
+                pool, run_wsgi, self.wsgi_app, build_environ(scope, bytes(body)))
+        finally:
+            if is_inference:
+                self.in_flight -= 1
+                metrics.set_in_flight(self.in_flight)
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    async def _respond(self, send, status, text, extra_headers=()):
+        headers = [(b'content-type', b'text/plain; charset=utf-8'),
+                   (b'content-length', str(len(text)).encode())] + list(extra_headers)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': text})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.inference_pool.shutdown(wait=False)
+                self.light_pool.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+app = BoundedWSGIServer(flask_app,
+                        workers=config.ASYNC_INFERENCE_WORKERS,
+                        queue_size=config.ASYNC_QUEUE_SIZE,
+                        retry_after=config.ASYNC_RETRY_AFTER_SECONDS,
+                        max_body_bytes=config.MAX_UPLOAD_BYTES)
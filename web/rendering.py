@@ -0,0 +1,74 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from flask import current_app, render_template
+from markupsafe import escape
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from src.knowledge_base import knowledge_base
+
+# result.html only differs per request in the image, the confidence and the model version.
+# The page is rendered once per class (and language) with placeholders in those spots and
+# kept as a list of fragments; a request just joins the fragments around its escaped values.
+DYNAMIC_FIELDS = ("img_src", "confidence", "model_version")
+PLACEHOLDERS = {name: f"\x00{name}\x00" for name in DYNAMIC_FIELDS}
+
+
+class ResultPageCache:
+    """LRU of pre-rendered result pages, keyed by class index, locale and knowledge-base version."""
+
+    def __init__(self, template='result.html', max_entries=256):
+        self.template = template
+        self.max_entries = max_entries
+        self._pages = OrderedDict()  # key -> [(static text, following dynamic field or None), ...]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data, locale):
+        locale = knowledge_base.resolve(locale)
+        return (data["class_index"], locale, knowledge_base.fingerprint(locale))
+
+    def render(self, img_src, data, locale=None):
+        # Live rendering while templates may change on disk (debug / TEMPLATES_AUTO_RELOAD)
+        if (not getattr(config, 'RENDER_CACHE', False) or current_app.jinja_env.auto_reload
+                or "class_index" not in data):
+            return render_template(self.template, img_src=img_src, data=data)
+
+        key = self.key(data, locale)
+        with self._lock:
+            fragments = self._pages.get(key)
+            if fragments is not None:
+                self._pages.move_to_end(key)
+        if fragments is None:
+            fragments = self._compile(data)
+            with self._lock:
+                self._pages[key] = fragments
+                while len(self._pages) > self.max_entries:
+                    self._pages.popitem(last=False)
+
+        # str(): joining plain text with Markup would escape the pre-rendered HTML again
+        values = {"img_src": str(escape(img_src)), "confidence": str(escape(data["confidence"])),
+                  "model_version": str(escape(data.get("model_version", "")))}
+        return "".join(text + (values[field] if field else "") for text, field in fragments)
+
+    def _compile(self, data):
+        page = render_template(self.template, img_src=PLACEHOLDERS["img_src"],
+                               data={**data, "confidence": PLACEHOLDERS["confidence"],
+                                     "model_version": PLACEHOLDERS["model_version"]})
+        # "a\0confidence\0b" -> [("a", "confidence"), ("b", None)]
+        parts = page.split("\x00")
+        fragments = []
+        for i in range(0, len(parts), 2):
+            field = parts[i + 1] if i + 1 < len(parts) else None
+            fragments.append((parts[i], field))
+        return fragments
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+
+result_pages = ResultPageCache()
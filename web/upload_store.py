@@ -0,0 +1,235 @@
+import os
+import sys
+import time
+import fcntl
+import hashlib
+import argparse
+import threading
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from src import metrics
+from src.image_io import make_thumbnail
+
+# Layout of config.UPLOAD_DIR (served under /static/uploads/):
+#
+#   audit/<ab>/<hash>.jpg    downscaled copy of an upload (UPLOAD_AUDIT_SIZE), the only copy kept
+#   thumbs/<ab>/<hash>.jpg   result-page thumbnail (THUMBNAIL_SIZE)
+#
+# <hash> is the digest of the uploaded bytes and <ab> its first two characters, so the same
+# photo is stored once and every folder holds ~1/256 of the store. Uploading a photo again
+# refreshes its files' mtime. The compaction pass deletes files older than the retention
+# period, then the oldest ones while the store is over its quota. Only one process per host
+# compacts at a time (lock file); the others skip that pass.
+
+KINDS = ("audit", "thumbs")
+SHARD_CHARS = 2
+QUOTA_LOW_WATERMARK = 0.9    # Evict down to 90% of the quota, so the next uploads don't evict again
+STALE_TMP_SECONDS = 3600     # Half-written files left by a crashed writer
+LEGACY_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def content_digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class UploadStore:
+    """Content-addressed, sharded and bounded upload storage."""
+
+    def __init__(self, root=None):
+        self.root = root or config.UPLOAD_DIR
+
+    def relpath(self, kind, digest):
+        return f"{kind}/{digest[:SHARD_CHARS]}/{digest}.jpg"
+
+    def path(self, kind, digest):
+        return os.path.join(self.root, kind, digest[:SHARD_CHARS], f"{digest}.jpg")
+
+    def touch(self, kind, digest):
+        """Restarts a stored file's age. False if it isn't stored."""
+        try:
+            os.utime(self.path(kind, digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def write(self, kind, digest, data):
+        path = self.path(kind, digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)  # Readers never see a half-written file
+        metrics.observe_upload_written(kind, len(data))
+        return path
+
+    def save_audit_copy(self, data, digest):
+        """Keeps a downscaled copy of an upload (called on the background writer)."""
+        if not self.touch("audit", digest):
+            self.write("audit", digest, make_thumbnail(data, config.UPLOAD_AUDIT_SIZE, config.UPLOAD_AUDIT_QUALITY))
+
+    def thumbnail(self, data, digest):
+        """Path of the upload's thumbnail relative to the store (written now if it isn't stored)."""
+        if not self.touch("thumbs", digest):
+            with metrics.stage("thumbnail"):
+                thumb = make_thumbnail(data, config.THUMBNAIL_SIZE, config.THUMBNAIL_QUALITY)
+            self.write("thumbs", digest, thumb)
+        return self.relpath("thumbs", digest)
+
+    # ==========================================
+    # Compaction & eviction
+    # ==========================================
+    def compact(self, now=None):
+        """
+        One pass: migrate loose files, drop stale temp files, apply the age and size quotas.
+        Returns {"stored": {kind: bytes}, "reclaimed": {reason: bytes}}, or None if another
+        process is compacting.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".compact.lock"), 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            return self._compact(now or time.time())  # Unlocked when the file closes
+
+    def _compact(self, now):
+        reclaimed = {"compaction": 0, "age": 0, "quota": 0}
+
+        # 1. Files from before the store (flat uploads/ and thumbs/): downscale or move into shards
+        reclaimed["compaction"] += self._migrate_loose_files()
+
+        # 2. Inventory (temp files of crashed writers are removed on the way)
+        files = []  # (mtime, size, path)
+        for kind in KINDS:
+            for entry in self._scan(kind):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # A writer's temp file, renamed since the listing
+                    continue
+                if entry.name.endswith(".tmp"):
+                    if now - stat.st_mtime > STALE_TMP_SECONDS:
+                        reclaimed["compaction"] += self._remove(entry.path, stat.st_size)
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        # 3. Age: nothing is kept past the retention period
+        if config.UPLOAD_RETENTION_DAYS:
+            cutoff = now - config.UPLOAD_RETENTION_DAYS * 86400
+            expired = [f for f in files if f[0] < cutoff]
+            files = [f for f in files if f[0] >= cutoff]
+            for _, size, path in expired:
+                reclaimed["age"] += self._remove(path, size)
+
+        # 4. Size: oldest first, down to the low watermark
+        total = sum(size for _, size, _ in files)
+        if config.UPLOAD_QUOTA_BYTES and total > config.UPLOAD_QUOTA_BYTES:
+            files.sort()
+            target = config.UPLOAD_QUOTA_BYTES * QUOTA_LOW_WATERMARK
+            evicted = 0
+            while evicted < len(files) and total > target:
+                _, size, path = files[evicted]
+                reclaimed["quota"] += self._remove(path, size)
+                total -= size
+                evicted += 1
+            files = files[evicted:]
+
+        stored = {kind: 0 for kind in KINDS}
+        for _, size, path in files:
+            stored[os.path.relpath(path, self.root).split(os.sep)[0]] += size
+        for kind, nbytes in stored.items():
+            metrics.set_upload_stored(kind, nbytes)
+        for reason, nbytes in reclaimed.items():
+            if nbytes:
+                metrics.observe_upload_reclaimed(reason, nbytes)
+        if any(reclaimed.values()):
+            print(f"🧹 Upload store: freed {sum(reclaimed.values()) / 1e6:.1f} MB {reclaimed}, "
+                  f"{sum(stored.values()) / 1e6:.1f} MB stored")
+        return {"stored": stored, "reclaimed": reclaimed}
+
+    def _scan(self, kind):
+        """Files of one kind, shard by shard (os.scandir: no per-file stat for the listing)."""
+        kind_dir = os.path.join(self.root, kind)
+        if not os.path.isdir(kind_dir):
+            return
+        for shard in os.scandir(kind_dir):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if entry.is_file():
+                        yield entry
+
+    def _migrate_loose_files(self):
+        """Originals saved at the top of uploads/ become audit copies; flat thumbnails move into shards."""
+        freed = 0
+        for entry in list(os.scandir(self.root)):
+            if not entry.is_file() or not entry.name.lower().endswith(LEGACY_EXTENSIONS):
+                continue
+            try:
+                stat = entry.stat()
+                with open(entry.path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            digest = content_digest(data)
+            try:
+                self.save_audit_copy(data, digest)
+                os.utime(self.path("audit", digest), (stat.st_mtime, stat.st_mtime))  # Keeps its upload age
+            except Exception as e:
+                print(f"⚠️ Dropping unreadable upload {entry.name}: {e!r}")
+            freed += self._remove(entry.path, stat.st_size)
+
+        thumbs_dir = os.path.join(self.root, "thumbs")
+        if os.path.isdir(thumbs_dir):
+            for entry in list(os.scandir(thumbs_dir)):
+                if entry.is_file() and entry.name.endswith(".jpg"):
+                    digest = entry.name[:-4]
+                    os.makedirs(os.path.dirname(self.path("thumbs", digest)), exist_ok=True)
+                    os.replace(entry.path, self.path("thumbs", digest))
+        return freed
+
+    @staticmethod
+    def _remove(path, size):
+        try:
+            os.remove(path)
+            return size
+        except FileNotFoundError:  # Already gone (another pass, or a manual cleanup)
+            return 0
+
+    def start_compactor(self, interval=None):
+        """Runs compact() every `interval` seconds on a daemon thread."""
+        interval = interval or config.UPLOAD_COMPACT_INTERVAL
+
+        def _run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"❌ Upload compaction failed: {e!r}")
+
+        thread = threading.Thread(target=_run, name="upload-compactor", daemon=True)
+        thread.start()
+        return thread
+
+
+# Shared by every request in the process
+upload_store = UploadStore()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one compaction / eviction pass over the upload store.")
+    parser.add_argument("--root", help=f"Store directory (default: {config.UPLOAD_DIR})")
+    args = parser.parse_args()
+    result = UploadStore(args.root).compact()
+    if result is None:
+        print("⏳ Another process is compacting the store.")
+        return
+    for kind, nbytes in result["stored"].items():
+        print(f"   {kind:<7} {nbytes / 1e6:8.1f} MB stored")
+    for reason, nbytes in result["reclaimed"].items():
+        print(f"   {reason:<10} {nbytes / 1e6:5.1f} MB freed")
+
+
+if __name__ == "__main__":
+    main()